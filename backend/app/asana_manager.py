@@ -16,6 +16,12 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session pool: concurrent connections, idle keepalive and
+# per-request timeout
+SESSION_MAX_CONNECTIONS = 64
+SESSION_KEEPALIVE_SECONDS = 30
+SESSION_TIMEOUT_SECONDS = 30
+
 @dataclass
 class AsanaTask:
     """Asana task representation."""
@@ -70,18 +76,36 @@ class AsanaManager:
     
     async def __aenter__(self):
         """Async context manager entry."""
-        self._session = aiohttp.ClientSession(
-            headers={
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-        )
+        self._get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self._session:
+        await self.close()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, opening it on first use."""
+        # One pooled session keeps connections to the API alive across
+        # requests instead of paying a TCP+TLS handshake for each one
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                connector=aiohttp.TCPConnector(
+                    limit=SESSION_MAX_CONNECTIONS,
+                    keepalive_timeout=SESSION_KEEPALIVE_SECONDS
+                ),
+                timeout=aiohttp.ClientTimeout(total=SESSION_TIMEOUT_SECONDS)
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self._session is not None:
             await self._session.close()
+            self._session = None
     
     async def _make_request(
         self, 
@@ -91,13 +115,11 @@ class AsanaManager:
         data: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Make authenticated request to Asana API."""
-        if not self._session:
-            raise RuntimeError("AsanaManager must be used as async context manager")
-        
+        session = self._get_session()
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         
         try:
-            async with self._session.request(
+            async with session.request(
                 method, 
                 url, 
                 params=params, 
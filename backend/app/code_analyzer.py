@@ -1,6 +1,7 @@
 import os
 import hashlib
 import json
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Set
 from dataclasses import dataclass, asdict
@@ -11,10 +12,23 @@ import tree_sitter_typescript    as tst
 import tempfile
 import shutil
 import asyncio
+import threading
 import aiohttp
 from datetime import datetime
 import re
 
+class AnalysisCancelled(Exception):
+    """Raised inside an analysis whose cancel event has been set."""
+
+def check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """Raise AnalysisCancelled if cancel_event is set.
+    
+    Asyncio cancellation can't stop a worker thread, so long-running steps
+    call this between units of work to stop cooperatively.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise AnalysisCancelled("Analysis cancelled")
+
 @dataclass
 class CodeChunk:
     """Represents a parsed code chunk with metadata."""
@@ -109,6 +123,33 @@ def init_languages():
 
 LANGUAGES = init_languages()
 
+# Directories never worth descending into when collecting source files
+PRUNED_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".idea", ".vscode", "__pycache__"
+})
+
+def walk_files(root: Path, exclude_dirs: Set[str] = PRUNED_DIRS):
+    """
+    Yield a DirEntry for every file under root.
+    
+    Uses os.scandir so entry types come from the directory listing instead
+    of extra stat calls, and skips excluded directories without visiting
+    anything inside them.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in exclude_dirs:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
 class CodeAnalyzer:
     def __init__(self, 
                  cache_dir: str = None,
@@ -120,6 +161,13 @@ class CodeAnalyzer:
         self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "halos_code_cache")
         self.summary_cache_dir = os.path.join(self.cache_dir, "summaries")
         self.chunk_cache_dir = os.path.join(self.cache_dir, "chunks")
+        # Parsers are cached per thread: analysis runs in worker threads and a
+        # tree-sitter Parser must not be shared between concurrent parses
+        self._thread_state = threading.local()
+        self._dependency_graph_lock = threading.Lock()
+        # Bumped whenever the indexes or the dependency graph may have changed,
+        # so callers can tell when results they cached are stale
+        self.version = 0
         
         os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.summary_cache_dir, exist_ok=True)
@@ -191,10 +239,16 @@ class CodeAnalyzer:
         }
         lang = ext_to_lang.get(file_path.suffix.lower())
         if lang and lang in LANGUAGES:
+            # Parsers are reusable across files, so build one per language
+            parsers = self._thread_state.__dict__.setdefault("parsers", {})
+            parser = parsers.get(lang)
+            if parser is not None:
+                return parser
             try:
                 # Create parser and set language using the modern API
                 parser = Parser()
                 parser.set_language(LANGUAGES[lang])
+                parsers[lang] = parser
                 return parser
             except Exception as e:
                 print(f"❌ Error creating parser for {lang}: {e}")
@@ -425,18 +479,19 @@ class CodeAnalyzer:
         }
         
         source_files = []
-        for file_path in repo_path.rglob('*'):
-            if (file_path.is_file() and 
-                file_path.suffix in source_extensions and 
-                not self.ignore_regex.search(str(file_path))):
-                source_files.append(file_path)
+        for entry in walk_files(repo_path):
+            if (os.path.splitext(entry.name)[1] in source_extensions and
+                not self.ignore_regex.search(entry.path)):
+                source_files.append(Path(entry.path))
         
         return source_files
 
-    async def analyze_repository(self, repo_path: Path) -> Dict[str, Any]:
-        """Analyze a repository and return structured data."""
-        print(f"Starting analysis of repository: {repo_path}")
-        
+    def _collect_chunks(
+        self,
+        repo_path: Path,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[List[Path], List[CodeChunk]]:
+        """Find the repository's source files and parse them into chunks."""
         # Get all source files
         source_files = self.get_source_files(repo_path)
         print(f"Found {len(source_files)} source files")
@@ -444,22 +499,68 @@ class CodeAnalyzer:
         # Parse all files into chunks
         all_chunks = []
         for file_path in source_files:
+            check_cancelled(cancel_event)
             chunks = self.parse_file(file_path)
             all_chunks.extend(chunks)
             print(f"Parsed {file_path.name}: {len(chunks)} chunks")
         
         print(f"Total chunks generated: {len(all_chunks)}")
+        return source_files, all_chunks
+
+    def _build_dependency_graph(self, chunks: List[CodeChunk], repo_path: str) -> Tuple[Any, Dict[str, Any]]:
+        """Build the dependency graph and its centrality metrics."""
+        # The builder keeps the graph on itself, so concurrent analyses must
+        # not interleave between building and scoring it
+        with self._dependency_graph_lock:
+            dependency_graph = self.dependency_graph_builder.build_dependency_graph(chunks, repo_path)
+            if dependency_graph is None:
+                return None, {}
+            print(f"Dependency graph: {dependency_graph.number_of_nodes()} nodes, {dependency_graph.number_of_edges()} edges")
+            return dependency_graph, self.dependency_graph_builder.compute_centrality_metrics()
+
+    async def analyze_repository(
+        self,
+        repo_path: Path,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """Analyze a repository and return structured data.
+        
+        Setting cancel_event stops the analysis at its next checkpoint with
+        AnalysisCancelled. The worker threads check it too, so once this
+        returns nothing is still reading the checkout or writing the index.
+        """
+        try:
+            return await self._analyze_repository(repo_path, cancel_event)
+        finally:
+            # Also bumped on failure: indexing may have finished before the error
+            self.version += 1
+
+    async def _analyze_repository(
+        self,
+        repo_path: Path,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        check_cancelled(cancel_event)
+        print(f"Starting analysis of repository: {repo_path}")
+        
+        # File walking, parsing, indexing and graph building are CPU-bound, so
+        # they run in worker threads to keep the event loop serving requests
+        source_files, all_chunks = await asyncio.to_thread(
+            self._collect_chunks, repo_path, cancel_event
+        )
         
         # Index chunks lexically if indexer is available
         if self.lexical_indexer and all_chunks:
+            check_cancelled(cancel_event)
             print("Indexing chunks for lexical search...")
-            self.lexical_indexer.index_chunks(all_chunks)
+            await asyncio.to_thread(self.lexical_indexer.index_chunks, all_chunks, cancel_event)
             index_stats = self.lexical_indexer.get_index_stats()
             print(f"Lexical index stats: {index_stats}")
         
         # Index chunks semantically if indexer is available
         vector_index_success = False
         if self.vector_indexer and all_chunks:
+            check_cancelled(cancel_event)
             print("Indexing chunks for semantic search...")
             vector_index_success = await self.vector_indexer.index_chunks(all_chunks)
             if vector_index_success:
@@ -471,17 +572,18 @@ class CodeAnalyzer:
         dependency_graph_success = False
         centrality_metrics = {}
         if self.dependency_graph_builder and all_chunks:
+            check_cancelled(cancel_event)
             print("Building dependency graph...")
-            dependency_graph = self.dependency_graph_builder.build_dependency_graph(all_chunks, str(repo_path))
+            dependency_graph, centrality_metrics = await asyncio.to_thread(
+                self._build_dependency_graph, all_chunks, str(repo_path)
+            )
             dependency_graph_success = dependency_graph is not None
-            if dependency_graph_success:
-                print(f"Dependency graph: {dependency_graph.number_of_nodes()} nodes, {dependency_graph.number_of_edges()} edges")
-                centrality_metrics = self.dependency_graph_builder.compute_centrality_metrics()
         
         # Generate hierarchical summary if summarizer is available and API key is configured
         hierarchical_summary = None
         hierarchical_summary_success = False
         if self.hierarchical_summarizer and all_chunks and self.hierarchical_summarizer.openai_api_key:
+            check_cancelled(cancel_event)
             print("🏗️ Generating hierarchical summary...")
             try:
                 hierarchical_summary = await self.hierarchical_summarizer.generate_hierarchical_summary(
@@ -540,16 +642,12 @@ class CodeAnalyzer:
 
     def _create_module_structure(self, file_summaries: List[FileSummary], repo_path: str) -> List[ModuleSummary]:
         """Create a hierarchical module structure from file summaries."""
-        # Group files by directory
-        files_by_dir = {}
+        # Group files by directory in a single pass
+        repo_root = Path(repo_path)
+        files_by_dir = defaultdict(list)
         for file_summary in file_summaries:
-            file_path = Path(file_summary.path)
-            relative_path = file_path.relative_to(Path(repo_path))
-            dir_path = str(relative_path.parent)
-            
-            if dir_path not in files_by_dir:
-                files_by_dir[dir_path] = []
-            files_by_dir[dir_path].append(file_summary)
+            relative_path = Path(file_summary.path).relative_to(repo_root)
+            files_by_dir[str(relative_path.parent)].append(file_summary)
         
         # Create module summaries
         modules = []
@@ -737,6 +835,40 @@ class CodeAnalyzer:
         
         return self.dependency_graph_builder.graph
     
+    def get_dependency_graph_snapshot(self) -> Optional[Tuple[List[Tuple], List[Tuple]]]:
+        """Get the full dependency graph's node and edge tuples from one consistent build.
+
+        The lists hold references to the graph's attribute dicts, so taking them is
+        cheap, and a rebuild that clears the graph afterwards doesn't affect them.
+        """
+        if not self.dependency_graph_builder:
+            print("Dependency graph builder not available")
+            return None
+        
+        with self._dependency_graph_lock:
+            graph = self.dependency_graph_builder.graph
+            return list(graph.nodes(data=True)), list(graph.edges(data=True))
+    
+    def get_call_graph_snapshot(self) -> Optional[Tuple[List[Tuple], List[Tuple]]]:
+        """Get the call graph's node and edge tuples, built from one consistent graph."""
+        if not self.dependency_graph_builder:
+            print("Dependency graph builder not available")
+            return None
+        
+        with self._dependency_graph_lock:
+            graph = self.dependency_graph_builder.get_call_graph()
+            return list(graph.nodes(data=True)), list(graph.edges(data=True))
+    
+    def get_import_graph_snapshot(self) -> Optional[Tuple[List[Tuple], List[Tuple]]]:
+        """Get the import graph's node and edge tuples, built from one consistent graph."""
+        if not self.dependency_graph_builder:
+            print("Dependency graph builder not available")
+            return None
+        
+        with self._dependency_graph_lock:
+            graph = self.dependency_graph_builder.get_import_graph()
+            return list(graph.nodes(data=True)), list(graph.edges(data=True))
+    
     def get_centrality_metrics(self) -> Dict[str, Dict[str, float]]:
         """Get centrality metrics for the call graph."""
         if not self.dependency_graph_builder:
@@ -4,6 +4,20 @@ import tree_sitter
 from tree_sitter import Language, Parser
 import os
 
+# File extension -> grammar directory name
+EXT_TO_LANG = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.hpp': 'cpp',
+    '.h': 'cpp',
+}
+
 class CodeParser:
     def __init__(self):
         """Initialize the code parser with tree-sitter."""
@@ -31,21 +45,7 @@ class CodeParser:
 
     def _get_parser_for_file(self, file_path: Path) -> Optional[Parser]:
         """Get the appropriate parser for a file based on its extension."""
-        ext = file_path.suffix.lower()
-        ext_to_lang = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.hpp': 'cpp',
-            '.h': 'cpp',
-        }
-        
-        lang = ext_to_lang.get(ext)
+        lang = EXT_TO_LANG.get(file_path.suffix.lower())
         if not lang or lang not in self.parsers:
             return None
         return self.parsers[lang]
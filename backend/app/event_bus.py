@@ -7,13 +7,19 @@ Supports enrichment and feeds downstream systems.
 """
 
 import asyncio
+import heapq
 import json
 import logging
+import queue
+import threading
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Union
+from itertools import islice
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass, asdict
 from pathlib import Path
+from types import MappingProxyType
 import sqlite3
 import aiosqlite
 
@@ -46,6 +52,68 @@ class EventSeverity(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Value -> member lookups for decoding stored rows without Enum.__call__
+_EVENT_TYPE_BY_VALUE = MappingProxyType({et.value: et for et in EventType})
+_SEVERITY_BY_VALUE = MappingProxyType({s.value: s for s in EventSeverity})
+
+# Stored event columns, in table order
+_EVENT_COLUMNS = (
+    "event_id", "event_type", "timestamp", "who", "what", "linked_to",
+    "metadata", "severity", "repository", "project", "enrichments"
+)
+
+# Per-connection settings for shard databases. WAL lets timeline reads run
+# alongside webhook writes and needs only one fsync per commit; it relies on
+# shared memory, so EVENT_DB_PATH must not be on a network filesystem (NFS)
+_SHARD_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-64000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+
+# Events timeline schema, created in every shard database
+_EVENTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        event_id TEXT PRIMARY KEY,
+        event_type TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        who TEXT NOT NULL,
+        what TEXT NOT NULL,
+        linked_to TEXT,
+        metadata TEXT,
+        severity TEXT,
+        repository TEXT,
+        project TEXT,
+        enrichments TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_timestamp ON events(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_event_type ON events(event_type);
+    CREATE INDEX IF NOT EXISTS idx_repository ON events(repository);
+    -- Covering index for timeline listings that only project these columns
+    CREATE INDEX IF NOT EXISTS idx_events_cover
+    ON events(timestamp DESC, event_type, repository, who, event_id);
+"""
+
+_INSERT_EVENT_SQL = """
+    INSERT OR REPLACE INTO events 
+    (event_id, event_type, timestamp, who, what, linked_to, 
+     metadata, severity, repository, project, enrichments)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Most events the writer thread commits in one transaction
+WRITER_MAX_BATCH = 500
+
+# GitHub PR webhook action -> event type ("closed" depends on the merged flag)
+_PR_ACTION_MAP = MappingProxyType({
+    "opened": EventType.GITHUB_PR_OPENED,
+    "edited": EventType.GITHUB_PR_UPDATED,
+    "synchronize": EventType.GITHUB_PR_UPDATED
+})
+
 @dataclass
 class NormalizedEvent:
     """Normalized event structure for the Scout event timeline."""
@@ -67,6 +135,107 @@ class NormalizedEvent:
         if self.enrichments is None:
             self.enrichments = {}
 
+def _resolve_write(future: asyncio.Future, error: Optional[BaseException]):
+    """Complete a submitted write's future on its event loop."""
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+class _EventWriter:
+    """
+    Dedicated thread that owns the write connections to the shard databases.
+    
+    SQLite allows one writer at a time and has no async I/O, so instead of
+    each insert hopping to a thread and committing alone, inserts are queued
+    here and group-committed: whatever is already queued when the writer
+    wakes is committed at once in one transaction per shard, so batches grow
+    on their own while a commit is in progress instead of waiting on a timer.
+    """
+    
+    def __init__(self, shard_path: Callable[[str], Path]):
+        self._shard_path = shard_path
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    async def submit(self, key: str, row: Tuple):
+        """Insert row into shard key, returning once it is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((key, row, loop, future))
+        await future
+    
+    async def stop(self):
+        """Commit pending inserts, then close the connections and the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            await asyncio.to_thread(self._thread.join)
+    
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < WRITER_MAX_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+        
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+    
+    def _write_batch(self, batch: List[Tuple]):
+        """Commit a batch of inserts with one transaction per shard."""
+        by_shard = defaultdict(list)
+        for key, row, loop, future in batch:
+            by_shard[key].append((row, loop, future))
+        
+        for key, items in by_shard.items():
+            error = None
+            conn = None
+            try:
+                conn = self._connection(key)
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(_INSERT_EVENT_SQL, [row for row, _, _ in items])
+                conn.execute("COMMIT")
+            except Exception as e:
+                error = e
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+            for _, loop, future in items:
+                try:
+                    loop.call_soon_threadsafe(_resolve_write, future, error)
+                except RuntimeError:
+                    pass  # The submitting loop has already closed
+    
+    def _connection(self, key: str) -> sqlite3.Connection:
+        """Return the write connection for a shard, creating its database on first use."""
+        conn = self._connections.get(key)
+        if conn is None:
+            conn = sqlite3.connect(self._shard_path(key), isolation_level=None)
+            (journal_mode,) = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+            if journal_mode.lower() != "wal":
+                logger.warning(f"Event shard is using journal_mode={journal_mode}, not WAL")
+            conn.executescript(_SHARD_PRAGMAS)
+            conn.executescript(_EVENTS_SCHEMA)
+            self._connections[key] = conn
+        return conn
+
 class EventBus:
     """
     Central event bus for Scout operational intelligence.
@@ -80,52 +249,131 @@ class EventBus:
     """
     
     def __init__(self, db_path: str = "/tmp/scout_events.db"):
+        # Events are sharded into one database per ISO week, stored next to
+        # db_path as e.g. /tmp/scout_events_2025W03.db
         self.db_path = db_path
         self.subscribers: List = []
         self._initialized = False
+        # Reads go through per-shard aiosqlite connections; all writes go
+        # through the writer thread
+        self._shards: Dict[str, aiosqlite.Connection] = {}
+        self._shards_lock = asyncio.Lock()
+        # Events stored before sharding stay in db_path itself, which is now
+        # only read; None until first checked, False if it holds no events
+        self._legacy_shard: Union[aiosqlite.Connection, bool, None] = None
+        self._writer = _EventWriter(self._shard_path)
     
     async def initialize(self):
         """Initialize the event bus and database."""
         if self._initialized:
             return
             
-        await self._create_database()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer.start()
         self._initialized = True
-        logger.info(f"🚌 Event Bus initialized with database at {self.db_path}")
-    
-    async def _create_database(self):
-        """Create the events timeline database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS events (
-                    event_id TEXT PRIMARY KEY,
-                    event_type TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    who TEXT NOT NULL,
-                    what TEXT NOT NULL,
-                    linked_to TEXT,
-                    metadata TEXT,
-                    severity TEXT,
-                    repository TEXT,
-                    project TEXT,
-                    enrichments TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_timestamp ON events(timestamp);
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_event_type ON events(event_type);
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_repository ON events(repository);
-            """)
-            
-            await db.commit()
+        logger.info(f"🚌 Event Bus initialized with weekly shards at {self.db_path}")
+    
+    async def close(self):
+        """Flush pending writes and close all open shard connections."""
+        await self._writer.stop()
+        # A stopped thread can't be restarted; initialize() starts a new one
+        self._writer = _EventWriter(self._shard_path)
+        self._initialized = False
+        async with self._shards_lock:
+            for db in self._shards.values():
+                await db.close()
+            self._shards.clear()
+            if self._legacy_shard:
+                await self._legacy_shard.close()
+            self._legacy_shard = None
+    
+    @staticmethod
+    def _shard_key(ts: datetime) -> str:
+        """ISO year/week key of the shard holding events at ts."""
+        return ts.strftime("%GW%V")
+    
+    def _shard_path(self, key: str) -> Path:
+        """Database file for a shard key."""
+        base = Path(self.db_path)
+        return base.with_name(f"{base.stem}_{key}{base.suffix}")
+    
+    def _existing_shard_keys(self) -> List[str]:
+        """Keys of all shards on disk, oldest first."""
+        base = Path(self.db_path)
+        prefix = f"{base.stem}_"
+        keys = []
+        for path in base.parent.glob(f"{prefix}*W*{base.suffix}"):
+            key = path.name[len(prefix):len(path.name) - len(base.suffix)]
+            if len(key) == 7 and key[4] == "W" and key.replace("W", "").isdigit():
+                keys.append(key)
+        return sorted(keys)
+    
+    def _shard_keys_for_range(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> List[str]:
+        """Keys of existing shards that can hold events in [start_time, end_time]."""
+        keys = self._existing_shard_keys()
+        if start_time:
+            start_key = self._shard_key(start_time)
+            keys = [k for k in keys if k >= start_key]
+        if end_time:
+            end_key = self._shard_key(end_time)
+            keys = [k for k in keys if k <= end_key]
+        return keys
+    
+    async def _get_shard(self, key: str) -> aiosqlite.Connection:
+        """Return the connection for a shard, creating its database on first use."""
+        db = self._shards.get(key)
+        if db is not None:
+            return db
+        
+        async with self._shards_lock:
+            db = self._shards.get(key)
+            if db is None:
+                db = await aiosqlite.connect(self._shard_path(key))
+                await self._configure_connection(db)
+                await self._create_database(db)
+                self._shards[key] = db
+        return db
+    
+    async def _get_legacy_shard(self) -> Optional[aiosqlite.Connection]:
+        """Return a read-only connection to the pre-sharding database, if it holds events."""
+        if self._legacy_shard is None:
+            async with self._shards_lock:
+                if self._legacy_shard is None:
+                    self._legacy_shard = await self._open_legacy_shard() or False
+        return self._legacy_shard or None
+    
+    async def _open_legacy_shard(self) -> Optional[aiosqlite.Connection]:
+        """Open db_path read-only, or return None if it has no events table."""
+        path = Path(self.db_path)
+        if not path.is_file():
+            return None
+        db = await aiosqlite.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'"
+            ) as cursor:
+                if await cursor.fetchone():
+                    return db
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"Ignoring unreadable legacy event database {path}: {e}")
+        await db.close()
+        return None
+    
+    async def _configure_connection(self, db: aiosqlite.Connection):
+        """Switch a shard to WAL journaling and apply the connection pragmas."""
+        async with db.execute("PRAGMA journal_mode=WAL") as cursor:
+            (journal_mode,) = await cursor.fetchone()
+        if journal_mode.lower() != "wal":
+            logger.warning(f"Event shard is using journal_mode={journal_mode}, not WAL")
+        await db.executescript(_SHARD_PRAGMAS)
+    
+    async def _create_database(self, db: aiosqlite.Connection):
+        """Create the events timeline schema in a shard database."""
+        await db.executescript(_EVENTS_SCHEMA)
     
     async def emit_event(self, event: NormalizedEvent) -> bool:
         """
@@ -150,38 +398,43 @@ class EventBus:
             return False
     
     async def _store_event(self, event: NormalizedEvent):
-        """Store event in the timeline database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO events 
-                (event_id, event_type, timestamp, who, what, linked_to, 
-                 metadata, severity, repository, project, enrichments)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                event.event_id,
-                event.event_type.value,
-                event.timestamp.isoformat(),
-                event.who,
-                event.what,
-                event.linked_to,
-                json.dumps(event.metadata),
-                event.severity.value,
-                event.repository,
-                event.project,
-                json.dumps(event.enrichments)
-            ))
-            await db.commit()
+        """Store event in the timeline shard for its week."""
+        await self._writer.submit(self._shard_key(event.timestamp), (
+            event.event_id,
+            event.event_type.value,
+            event.timestamp.isoformat(),
+            event.who,
+            event.what,
+            event.linked_to,
+            json.dumps(event.metadata),
+            event.severity.value,
+            event.repository,
+            event.project,
+            json.dumps(event.enrichments)
+        ))
     
     async def _notify_subscribers(self, event: NormalizedEvent):
-        """Notify all subscribers about the new event."""
+        """Notify all subscribers about the new event.
+        
+        Sync subscribers run inline; async subscribers run concurrently.
+        """
+        async_subscribers = []
         for subscriber in self.subscribers:
+            if asyncio.iscoroutinefunction(subscriber):
+                async_subscribers.append(subscriber)
+                continue
             try:
-                if asyncio.iscoroutinefunction(subscriber):
-                    await subscriber(event)
-                else:
-                    subscriber(event)
+                subscriber(event)
             except Exception as e:
                 logger.error(f"Subscriber notification failed: {e}")
+        
+        results = await asyncio.gather(
+            *(subscriber(event) for subscriber in async_subscribers),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Subscriber notification failed: {result}")
     
     def subscribe(self, callback):
         """Subscribe to event notifications."""
@@ -194,13 +447,36 @@ class EventBus:
         end_time: Optional[datetime] = None,
         event_types: Optional[List[EventType]] = None,
         repository: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        projection: Optional[List[str]] = None
     ) -> List[NormalizedEvent]:
-        """Retrieve events from the timeline with filters."""
+        """
+        Retrieve events from the timeline with filters.
+        
+        Only the weekly shards overlapping [start_time, end_time] are
+        queried, along with any pre-sharding database at db_path; their
+        newest-first results are merged into one list.
+        
+        If projection is given, only those columns (plus timestamp, which
+        orders the merge) are selected and the returned events leave the
+        other fields empty. Projecting a subset of event_id, event_type,
+        timestamp, who and repository is answered from the covering index
+        alone.
+        """
         if not self._initialized:
             await self.initialize()
         
-        query = "SELECT * FROM events WHERE 1=1"
+        if projection:
+            unknown = set(projection) - set(_EVENT_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown event columns: {sorted(unknown)}")
+            columns = [c for c in _EVENT_COLUMNS if c in projection or c == "timestamp"]
+            ts_index = columns.index("timestamp")
+            query = f"SELECT {', '.join(columns)} FROM events WHERE 1=1"
+        else:
+            columns = None
+            ts_index = 2
+            query = "SELECT * FROM events WHERE 1=1"
         params = []
         
         if start_time:
@@ -223,21 +499,41 @@ class EventBus:
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
         
-        async with aiosqlite.connect(self.db_path) as db:
+        async def query_db(db: aiosqlite.Connection):
             async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
+                return await cursor.fetchall()
+        
+        async def query_shard(key: str):
+            return await query_db(await self._get_shard(key))
         
+        async def query_legacy():
+            # Pre-sharding events can be from any week, so this is always queried
+            db = await self._get_legacy_shard()
+            return await query_db(db) if db else []
+        
+        keys = self._shard_keys_for_range(start_time, end_time)
+        shard_rows = await asyncio.gather(query_legacy(), *(query_shard(key) for key in keys))
+        rows = list(islice(
+            heapq.merge(*shard_rows, key=lambda r: r[ts_index], reverse=True),
+            limit
+        ))
+        
+        if columns:
+            return [self._partial_event(dict(zip(columns, row))) for row in rows]
+        
+        event_type_by_value = _EVENT_TYPE_BY_VALUE
+        severity_by_value = _SEVERITY_BY_VALUE
         events = []
         for row in rows:
             event = NormalizedEvent(
                 event_id=row[0],
-                event_type=EventType(row[1]),
+                event_type=event_type_by_value[row[1]],
                 timestamp=datetime.fromisoformat(row[2]),
                 who=row[3],
                 what=row[4],
                 linked_to=row[5],
                 metadata=json.loads(row[6]) if row[6] else {},
-                severity=EventSeverity(row[7]),
+                severity=severity_by_value[row[7]],
                 repository=row[8],
                 project=row[9],
                 enrichments=json.loads(row[10]) if row[10] else {}
@@ -246,6 +542,27 @@ class EventBus:
         
         return events
     
+    def _partial_event(self, values: Dict[str, Any]) -> NormalizedEvent:
+        """Build an event from a projected row; unselected fields stay None."""
+        event_type = values.get("event_type")
+        timestamp = values.get("timestamp")
+        severity = values.get("severity")
+        metadata = values.get("metadata")
+        enrichments = values.get("enrichments")
+        return NormalizedEvent(
+            event_id=values.get("event_id"),
+            event_type=_EVENT_TYPE_BY_VALUE[event_type] if event_type else None,
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+            who=values.get("who"),
+            what=values.get("what"),
+            linked_to=values.get("linked_to"),
+            metadata=json.loads(metadata) if metadata else None,
+            severity=_SEVERITY_BY_VALUE[severity] if severity else None,
+            repository=values.get("repository"),
+            project=values.get("project"),
+            enrichments=json.loads(enrichments) if enrichments else None
+        )
+    
     # Event Normalization Methods
     
     def normalize_github_push(self, payload: Dict[str, Any]) -> NormalizedEvent:
@@ -273,14 +590,10 @@ class EventBus:
         """Normalize GitHub PR webhook payload."""
         pr = payload["pull_request"]
         
-        action_map = {
-            "opened": EventType.GITHUB_PR_OPENED,
-            "closed": EventType.GITHUB_PR_MERGED if pr.get("merged") else EventType.GITHUB_PR_CLOSED,
-            "edited": EventType.GITHUB_PR_UPDATED,
-            "synchronize": EventType.GITHUB_PR_UPDATED
-        }
-        
-        event_type = action_map.get(action, EventType.GITHUB_PR_UPDATED)
+        if action == "closed":
+            event_type = EventType.GITHUB_PR_MERGED if pr.get("merged") else EventType.GITHUB_PR_CLOSED
+        else:
+            event_type = _PR_ACTION_MAP.get(action, EventType.GITHUB_PR_UPDATED)
         
         return NormalizedEvent(
             event_id=f"github_pr_{pr['id']}_{action}",
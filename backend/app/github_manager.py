@@ -1,6 +1,11 @@
 import os
+import asyncio
 import tempfile
 import shutil
+import threading
+import time
+import uuid
+import sqlite3
 from pathlib import Path
 from typing import Dict, Optional, Tuple, List
 import validators
@@ -8,12 +13,125 @@ import git
 from urllib.parse import urlparse
 import re
 
+# Repository listings are reused for this many seconds; clones, updates and
+# deletes made through the manager invalidate them immediately
+REPO_LIST_TTL = 5.0
+
 class GitHubManager:
     """Manages GitHub repository cloning and validation."""
     
     def __init__(self, cache_dir: str = "/tmp/halos_repos"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        
+        # Metadata index so listing repos doesn't walk every checkout
+        self.index_db_path = self.cache_dir / "repo_index.db"
+        self._ensure_index_db()
+        
+        # Checkouts being deleted are moved here first (no .git at this level,
+        # so it is never listed as a repo); clear out anything left behind
+        self.trash_dir = self.cache_dir / ".trash"
+        self.trash_dir.mkdir(exist_ok=True)
+        for leftover in self.trash_dir.iterdir():
+            self._delete_in_background(leftover)
+        
+        # (checked_at, generation, repos) of the last listing; any change to
+        # the cache bumps the generation
+        self._repo_list_cache: Optional[Tuple[float, int, List[Dict]]] = None
+        self._repo_list_generation = 0
+    
+    def _ensure_index_db(self):
+        """Create the SQLite index of cached repository metadata."""
+        conn = sqlite3.connect(self.index_db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS repo_index (
+                local_path TEXT PRIMARY KEY,
+                owner TEXT,
+                repo TEXT,
+                github_url TEXT,
+                commit_hash TEXT,
+                commit_message TEXT,
+                commit_author TEXT,
+                commit_date TEXT,
+                file_count INTEGER,
+                size_bytes INTEGER,
+                updated_at REAL
+            )
+        """)
+        conn.commit()
+        conn.close()
+    
+    def _git_mtime(self, repo_dir: Path) -> float:
+        """Latest modification time of the repository's git metadata."""
+        git_dir = repo_dir / '.git'
+        # git rewrites .git/index (and ORIG_HEAD etc.) via lock-file renames,
+        # which bumps the .git directory mtime on pull/reset/checkout
+        return max(git_dir.stat().st_mtime, (git_dir / 'HEAD').stat().st_mtime)
+    
+    def _inspect_repo(self, repo_dir: Path, owner: str, repo_name: str) -> Dict:
+        """Walk a cached checkout and collect its metadata."""
+        repo = git.Repo(repo_dir)
+        commit_info = repo.head.commit
+        
+        # Get remote URL if available
+        remote_url = None
+        if repo.remotes:
+            remote_url = repo.remotes.origin.url
+        
+        # Count and size tracked files from the tree listing ("mode type hash size\tpath")
+        # instead of stat-ing every file in the checkout
+        file_count = 0
+        repo_size = 0
+        for line in repo.git.ls_tree("-r", "-l", "HEAD").splitlines():
+            meta, _, _ = line.partition("\t")
+            _, obj_type, _, size = meta.split()
+            if obj_type == "blob":
+                file_count += 1
+                repo_size += int(size)
+        
+        return {
+            "local_path": str(repo_dir),
+            "owner": owner,
+            "repository": repo_name,
+            "github_url": remote_url,
+            "commit_hash": commit_info.hexsha[:8],
+            "commit_message": commit_info.message.strip(),
+            "commit_author": commit_info.author.name,
+            "commit_date": commit_info.committed_datetime.isoformat(),
+            "file_count": file_count,
+            "size_bytes": repo_size
+        }
+    
+    def _index_repo(self, info: Dict) -> None:
+        """Insert or refresh a repository's row in the metadata index."""
+        conn = sqlite3.connect(self.index_db_path)
+        conn.execute("""
+            INSERT OR REPLACE INTO repo_index
+            (local_path, owner, repo, github_url, commit_hash, commit_message,
+             commit_author, commit_date, file_count, size_bytes, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            info["local_path"],
+            info["owner"],
+            info["repository"],
+            info["github_url"],
+            info["commit_hash"],
+            info["commit_message"],
+            info["commit_author"],
+            info["commit_date"],
+            info["file_count"],
+            info["size_bytes"],
+            self._git_mtime(Path(info["local_path"]))
+        ))
+        conn.commit()
+        conn.close()
+    
+    def _unindex_repo(self, repo_dir: Path) -> None:
+        """Remove a repository's row from the metadata index."""
+        conn = sqlite3.connect(self.index_db_path)
+        conn.execute("DELETE FROM repo_index WHERE local_path = ?", (str(repo_dir),))
+        conn.commit()
+        conn.close()
     
     def is_github_url(self, url: str) -> bool:
         """Check if the URL is a valid GitHub repository URL."""
@@ -70,6 +188,111 @@ class GitHubManager:
         owner, repo = self.extract_repo_info(url)
         return self.cache_dir / f"{owner}_{repo}"
     
+    def _discard_dir(self, path: Path) -> None:
+        """Remove a checkout from the cache without waiting for the delete."""
+        # Renaming is a single metadata operation, so the path is free again
+        # immediately; the slow recursive delete happens in the background
+        trash_path = self.trash_dir / f"{path.name}-{uuid.uuid4().hex}"
+        path.rename(trash_path)
+        self._repo_list_generation += 1
+        self._delete_in_background(trash_path)
+    
+    @staticmethod
+    def _delete_in_background(path: Path) -> None:
+        """Delete a directory tree on a daemon thread."""
+        threading.Thread(
+            target=shutil.rmtree, args=(path,), kwargs={"ignore_errors": True}, daemon=True
+        ).start()
+    
+    def _clone_repo(self, url: str, cache_path: Path) -> None:
+        """Make a partial clone of a repository's default branch."""
+        # Only the tip of the default branch, no tags, and blobs fetched on
+        # demand by the checkout instead of up front
+        git.Repo.clone_from(
+            url,
+            cache_path,
+            depth=1,
+            single_branch=True,
+            no_tags=True,
+            filter='blob:none'
+        )
+    
+    def _fetch_repo(self, cache_path: Path) -> bool:
+        """Fetch the tip of a checkout's remote branch; return whether the checkout is behind it."""
+        # Only touches .git, so the working tree can be read meanwhile
+        repo = git.Repo(cache_path)
+        repo.git.fetch("--depth=1", "--no-tags", "origin")
+        return repo.git.rev_parse("FETCH_HEAD") != repo.head.commit.hexsha
+    
+    def _update_repo(self, cache_path: Path) -> None:
+        """Move a cached checkout to the tip of its remote branch."""
+        # A shallow fetch of the tracked branch plus a hard reset; a pull would
+        # try to merge into the truncated history and can fetch far more
+        self._fetch_repo(cache_path)
+        git.Repo(cache_path).git.reset("--hard", "FETCH_HEAD")
+    
+    def cached_repo_path(self, github_url: str) -> Optional[Path]:
+        """Local checkout of a repository, if it is already cached."""
+        cache_path = self.get_repo_cache_path(github_url)
+        return cache_path if (cache_path / '.git').exists() else None
+    
+    async def fetch_cached_repo(self, github_url: str) -> bool:
+        """
+        Fetch the remote tip of a cached checkout without changing its files.
+        
+        Returns whether the checkout is behind the remote; apply_fetched_update
+        then moves it forward.
+        """
+        try:
+            return await asyncio.to_thread(self._fetch_repo, self.get_repo_cache_path(github_url))
+        except git.exc.GitCommandError as e:
+            raise self._git_error(e)
+    
+    async def apply_fetched_update(self, github_url: str, behind: bool) -> Dict:
+        """Reset a cached checkout to the tip fetched by fetch_cached_repo and return information."""
+        owner, repo_name = self.extract_repo_info(github_url)
+        cache_path = self.get_repo_cache_path(github_url)
+        
+        try:
+            if behind:
+                await asyncio.to_thread(git.Repo(cache_path).git.reset, "--hard", "FETCH_HEAD")
+            return await self._record_repo("updated", github_url, cache_path, owner, repo_name)
+        except git.exc.GitCommandError as e:
+            raise self._git_error(e)
+    
+    async def _record_repo(self, action: str, github_url: str, cache_path: Path,
+                           owner: str, repo_name: str) -> Dict:
+        """Index a freshly cloned or updated checkout and describe it."""
+        info = await asyncio.to_thread(self._inspect_repo, cache_path, owner, repo_name)
+        await asyncio.to_thread(self._index_repo, info)
+        self._repo_list_generation += 1
+        repo_size = info["size_bytes"]
+        
+        return {
+            "action": action,
+            "local_path": info["local_path"],
+            "github_url": github_url,
+            "owner": owner,
+            "repository": repo_name,
+            "commit_hash": info["commit_hash"],
+            "commit_message": info["commit_message"],
+            "commit_author": info["commit_author"],
+            "commit_date": info["commit_date"],
+            "file_count": info["file_count"],
+            "size_bytes": repo_size,
+            "size_mb": round(repo_size / (1024 * 1024), 2)
+        }
+    
+    @staticmethod
+    def _git_error(e: git.exc.GitCommandError) -> ValueError:
+        """Translate a git failure into a user-facing error."""
+        if "Authentication failed" in str(e):
+            return ValueError("Repository is private or authentication failed")
+        elif "Repository not found" in str(e):
+            return ValueError("Repository not found or does not exist")
+        else:
+            return ValueError(f"Git operation failed: {str(e)}")
+    
     async def clone_or_update_repo(self, github_url: str, force_fresh: bool = False) -> Dict:
         """Clone or update a GitHub repository and return information."""
         if not self.is_github_url(github_url):
@@ -81,97 +304,105 @@ class GitHubManager:
         
         # Remove existing clone if force_fresh is True
         if force_fresh and cache_path.exists():
-            shutil.rmtree(cache_path)
+            self._discard_dir(cache_path)
         
         try:
             if cache_path.exists() and (cache_path / '.git').exists():
-                # Repository exists, try to update
-                repo = git.Repo(cache_path)
-                origin = repo.remotes.origin
-                origin.pull()
+                # Repository exists, bring it up to date
+                await asyncio.to_thread(self._update_repo, cache_path)
                 action = "updated"
             else:
                 # Clone fresh repository
                 if cache_path.exists():
-                    shutil.rmtree(cache_path)
+                    self._discard_dir(cache_path)
                 
-                repo = git.Repo.clone_from(normalized_url, cache_path, depth=1)
+                await asyncio.to_thread(self._clone_repo, normalized_url, cache_path)
                 action = "cloned"
             
-            # Get repository information
-            commit_info = repo.head.commit
-            
-            # Count files
-            file_count = sum(1 for _ in cache_path.rglob('*') if _.is_file() and not str(_).startswith('.git'))
-            
-            # Get repository size
-            repo_size = sum(f.stat().st_size for f in cache_path.rglob('*') if f.is_file() and not str(f).startswith('.git'))
-            
-            return {
-                "action": action,
-                "local_path": str(cache_path),
-                "github_url": github_url,
-                "owner": owner,
-                "repository": repo_name,
-                "commit_hash": commit_info.hexsha[:8],
-                "commit_message": commit_info.message.strip(),
-                "commit_author": commit_info.author.name,
-                "commit_date": commit_info.committed_datetime.isoformat(),
-                "file_count": file_count,
-                "size_bytes": repo_size,
-                "size_mb": round(repo_size / (1024 * 1024), 2)
-            }
+            # Get repository information and record it in the index
+            return await self._record_repo(action, github_url, cache_path, owner, repo_name)
             
         except git.exc.GitCommandError as e:
-            if "Authentication failed" in str(e):
-                raise ValueError("Repository is private or authentication failed")
-            elif "Repository not found" in str(e):
-                raise ValueError("Repository not found or does not exist")
-            else:
-                raise ValueError(f"Git operation failed: {str(e)}")
+            raise self._git_error(e)
         except Exception as e:
             raise ValueError(f"Failed to clone repository: {str(e)}")
     
     def list_cached_repos(self) -> List[Dict]:
         """List all cached repositories."""
+        cached = self._repo_list_cache
+        if (cached is not None and cached[1] == self._repo_list_generation
+                and time.monotonic() - cached[0] < REPO_LIST_TTL):
+            return list(cached[2])
+        
+        generation = self._repo_list_generation
+        repos = self._scan_cached_repos()
+        # Don't cache a listing that raced with a clone or delete
+        if generation == self._repo_list_generation:
+            self._repo_list_cache = (time.monotonic(), generation, repos)
+        return list(repos)
+    
+    def _scan_cached_repos(self) -> List[Dict]:
+        """Build the repository listing from the index and the cache directory."""
         repos = []
         
+        conn = sqlite3.connect(self.index_db_path)
+        rows = conn.execute("""
+            SELECT local_path, owner, repo, github_url, commit_hash, commit_message,
+                   commit_author, commit_date, file_count, size_bytes, updated_at
+            FROM repo_index
+        """).fetchall()
+        conn.close()
+        indexed = {row[0]: row for row in rows}
+        
         for repo_dir in self.cache_dir.iterdir():
             if repo_dir.is_dir() and (repo_dir / '.git').exists():
                 try:
-                    repo = git.Repo(repo_dir)
-                    commit_info = repo.head.commit
-                    
-                    # Parse owner and repo name from directory name
-                    parts = repo_dir.name.split('_', 1)
-                    owner = parts[0] if len(parts) > 0 else "unknown"
-                    repo_name = parts[1] if len(parts) > 1 else repo_dir.name
+                    row = indexed.pop(str(repo_dir), None)
                     
-                    # Get remote URL if available
-                    remote_url = None
-                    if repo.remotes:
-                        remote_url = repo.remotes.origin.url
-                    
-                    file_count = sum(1 for _ in repo_dir.rglob('*') if _.is_file() and not str(_).startswith('.git'))
-                    repo_size = sum(f.stat().st_size for f in repo_dir.rglob('*') if f.is_file() and not str(f).startswith('.git'))
+                    if row and self._git_mtime(repo_dir) <= row[10]:
+                        # Index is current - no need to walk the checkout
+                        info = {
+                            "local_path": row[0],
+                            "owner": row[1],
+                            "repository": row[2],
+                            "github_url": row[3],
+                            "commit_hash": row[4],
+                            "commit_message": row[5],
+                            "commit_author": row[6],
+                            "commit_date": row[7],
+                            "file_count": row[8],
+                            "size_bytes": row[9]
+                        }
+                    else:
+                        # Parse owner and repo name from directory name
+                        parts = repo_dir.name.split('_', 1)
+                        owner = parts[0] if len(parts) > 0 else "unknown"
+                        repo_name = parts[1] if len(parts) > 1 else repo_dir.name
+                        
+                        info = self._inspect_repo(repo_dir, owner, repo_name)
+                        self._index_repo(info)
                     
                     repos.append({
-                        "local_path": str(repo_dir),
-                        "owner": owner,
-                        "repository": repo_name,
-                        "github_url": remote_url,
-                        "commit_hash": commit_info.hexsha[:8],
-                        "commit_message": commit_info.message.strip(),
-                        "commit_author": commit_info.author.name,
-                        "commit_date": commit_info.committed_datetime.isoformat(),
-                        "file_count": file_count,
-                        "size_mb": round(repo_size / (1024 * 1024), 2),
+                        "local_path": info["local_path"],
+                        "owner": info["owner"],
+                        "repository": info["repository"],
+                        "github_url": info["github_url"],
+                        "commit_hash": info["commit_hash"],
+                        "commit_message": info["commit_message"],
+                        "commit_author": info["commit_author"],
+                        "commit_date": info["commit_date"],
+                        "file_count": info["file_count"],
+                        "size_mb": round(info["size_bytes"] / (1024 * 1024), 2),
                         "last_updated": repo_dir.stat().st_mtime
                     })
                 except Exception:
                     # Skip directories that aren't valid git repos
                     continue
         
+        # Drop index rows for checkouts that no longer exist
+        for local_path in indexed:
+            self._unindex_repo(Path(local_path))
+        
         return sorted(repos, key=lambda x: x['last_updated'], reverse=True)
     
     def delete_cached_repo(self, github_url: str) -> bool:
@@ -179,7 +410,8 @@ class GitHubManager:
         cache_path = self.get_repo_cache_path(github_url)
         
         if cache_path.exists():
-            shutil.rmtree(cache_path)
+            self._discard_dir(cache_path)
+            self._unindex_repo(cache_path)
             return True
         return False
     
@@ -197,7 +429,8 @@ class GitHubManager:
         for repo in repos_to_remove:
             repo_path = Path(repo['local_path'])
             if repo_path.exists():
-                shutil.rmtree(repo_path)
+                self._discard_dir(repo_path)
+                self._unindex_repo(repo_path)
                 removed_count += 1
         
         return removed_count 
\ No newline at end of file
@@ -1,13 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import networkx as nx
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from pathlib import Path
 from .code_parser import CodeParser
 
+# Deepest node depth (path-segment count) shown at each semantic zoom level;
+# levels not listed include everything.
+_LEVEL_MAX_DEPTH = {
+    1: 2,  # Repository and top-level folders
+    2: 3,  # Include files
+}
+
+# Number of recent parse trees kept in memory for incremental re-parsing
+_TREE_CACHE_SIZE = 256
+
+# Below this many files to parse, process_files stays in-process
+_PARALLEL_MIN_FILES = 16
+
+# AST node types named after their identifier rather than their type
+_NAMED_NODE_TYPES = frozenset(('function_definition', 'method_definition', 'class_definition'))
+
+# Node attributes reported at the top level (or not at all) rather than under "data"
+_NON_DATA_ATTRS = frozenset(("type", "name", "_depth"))
+
+def _point_at(source: bytes, offset: int) -> Tuple[int, int]:
+    """(row, column) of a byte offset, as tree-sitter points are expressed."""
+    row = source.count(b"\n", 0, offset)
+    return row, offset - (source.rfind(b"\n", 0, offset) + 1)
+
+def _edit_range(old_source: bytes, new_source: bytes) -> Dict[str, Any]:
+    """Tree.edit() arguments for the span that differs between two sources."""
+    old_len = len(old_source)
+    new_len = len(new_source)
+    
+    # Binary-search the common prefix/suffix lengths with slice compares,
+    # which run in C instead of stepping byte by byte
+    lo, hi = 0, min(old_len, new_len)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_source[:mid] == new_source[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+    
+    lo, hi = 0, min(old_len, new_len) - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_source[old_len - mid:] == new_source[new_len - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    suffix = lo
+    
+    old_end = old_len - suffix
+    new_end = new_len - suffix
+    return {
+        "start_byte": start,
+        "old_end_byte": old_end,
+        "new_end_byte": new_end,
+        "start_point": _point_at(old_source, start),
+        "old_end_point": _point_at(old_source, old_end),
+        "new_end_point": _point_at(new_source, new_end),
+    }
+
+# Per-worker-process parser, created on first use
+_worker_parser: Optional[CodeParser] = None
+
+def _parse_to_flat(file_path: str, source_code: bytes) -> Optional[List[Tuple]]:
+    """Parse a file in a worker process and return its flattened AST."""
+    global _worker_parser
+    try:
+        if _worker_parser is None:
+            _worker_parser = CodeParser()
+        parser = _worker_parser._get_parser_for_file(Path(file_path))
+        if not parser:
+            return None
+        tree = parser.parse(source_code)
+        if not tree:
+            return None
+        return GraphBuilder._flatten_ast(tree.root_node, source_code)
+    except Exception as e:
+        print(f"Error processing file {file_path}: {e}")
+        return None
+
 class GraphBuilder:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         """Initialize the graph builder."""
         self.graph = nx.DiGraph()
         self.parser = CodeParser()
+        
+        # Flattened parse trees keyed by (path, content hash), so unchanged
+        # files are not re-parsed across runs
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), ".scout_cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Files may be processed from worker threads, so the connection is
+        # shared across threads and serialized by a lock
+        self._ast_cache = sqlite3.connect(
+            os.path.join(self.cache_dir, "ast_cache.db"), check_same_thread=False
+        )
+        self._ast_cache_lock = threading.Lock()
+        self._ast_cache.execute("PRAGMA journal_mode=WAL")
+        self._ast_cache.execute("PRAGMA synchronous=NORMAL")
+        self._ast_cache.execute("""
+            CREATE TABLE IF NOT EXISTS ast_cache (
+                path TEXT,
+                sha BLOB,
+                blob BLOB,
+                PRIMARY KEY (path, sha)
+            )
+        """)
+        self._ast_cache.commit()
+        
+        # Last (source, tree) per path, so edited files are re-parsed incrementally
+        self._tree_cache: "OrderedDict[str, Tuple[bytes, Any]]" = OrderedDict()
+        
+        # Pending nodes/edges, added to the graph in bulk by _flush()
+        self._nodes_buf: List[Tuple[str, Dict[str, Any]]] = []
+        self._edges_buf: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def _flush(self) -> None:
+        """Add all buffered nodes and edges to the graph in one call each."""
+        self.graph.add_nodes_from(self._nodes_buf)
+        self.graph.add_edges_from(self._edges_buf)
+        self._nodes_buf = []
+        self._edges_buf = []
 
     def process_file(self, file_path: Path, relative_path: str) -> None:
         """
@@ -23,71 +148,242 @@ class GraphBuilder:
             return
 
         try:
-            # Read and parse the file
+            # Read the file and reuse its parse if the content is unchanged
             with open(file_path, 'rb') as f:
                 source_code = f.read()
             
-            tree = parser.parse(source_code)
-            if not tree:
-                return
-
-            # Add file node if it doesn't exist
-            file_id = relative_path
-            if not self.graph.has_node(file_id):
-                self.graph.add_node(
-                    file_id,
-                    type="file",
-                    name=Path(relative_path).name,
-                    path=relative_path
-                )
+            cache_path = str(file_path)
+            sha = hashlib.sha256(source_code).digest()
+            flat = self._get_cached_ast(cache_path, sha)
+            if flat is None:
+                tree = self._parse(parser, cache_path, source_code)
+                if not tree:
+                    return
+                flat = self._flatten_ast(tree.root_node, source_code)
+                self._cache_ast(cache_path, sha, flat)
 
-            # Process the AST
-            self._process_ast_node(tree.root_node, file_id, source_code)
+            self._add_file_ast(relative_path, flat)
 
         except Exception as e:
             print(f"Error processing file {file_path}: {e}")
 
-    def _process_ast_node(self, node: Any, parent_id: str, source_code: bytes) -> None:
+    def process_files(self, files: List[Tuple[Path, str]]) -> None:
         """
-        Process an AST node and add it to the graph.
+        Process many files and add their structure to the graph.
+        
+        Files whose parse is not cached are parsed in worker processes when
+        there are enough of them to outweigh the pool startup cost.
         
         Args:
-            node: Tree-sitter AST node
-            parent_id: ID of the parent node
-            source_code: Source code bytes
+            files: (file_path, relative_path) pairs
         """
-        # Get node type and name
-        node_type = node.type
-        node_name = self._get_node_name(node, source_code)
+        if len(files) < _PARALLEL_MIN_FILES:
+            for file_path, relative_path in files:
+                self.process_file(file_path, relative_path)
+            return
         
-        # Create node ID
-        node_id = f"{parent_id}/{node_type}/{node_name}"
+        # Serve cache hits directly and collect the files that need parsing
+        pending = []
+        for file_path, relative_path in files:
+            if not self.parser._get_parser_for_file(file_path):
+                continue
+            try:
+                with open(file_path, 'rb') as f:
+                    source_code = f.read()
+                cache_path = str(file_path)
+                sha = hashlib.sha256(source_code).digest()
+                flat = self._get_cached_ast(cache_path, sha)
+                if flat is None:
+                    pending.append((cache_path, relative_path, sha, source_code))
+                else:
+                    self._add_file_ast(relative_path, flat)
+            except Exception as e:
+                print(f"Error processing file {file_path}: {e}")
         
-        # Add node to graph
-        self.graph.add_node(
-            node_id,
-            type=node_type,
-            name=node_name,
-            start_point=(node.start_point[0], node.start_point[1]),
-            end_point=(node.end_point[0], node.end_point[1])
-        )
+        if len(pending) < _PARALLEL_MIN_FILES:
+            for cache_path, relative_path, _, _ in pending:
+                self.process_file(Path(cache_path), relative_path)
+            return
+        
+        workers = os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                _parse_to_flat,
+                [item[0] for item in pending],
+                [item[3] for item in pending],
+                chunksize=max(1, len(pending) // (workers * 4))
+            )
+            for (cache_path, relative_path, sha, _), flat in zip(pending, results):
+                if flat is None:
+                    continue
+                self._cache_ast(cache_path, sha, flat)
+                self._add_file_ast(relative_path, flat)
+
+    def _add_file_ast(self, relative_path: str, flat: List[Tuple]) -> None:
+        """Add a file node (if missing) and its flattened AST to the graph."""
+        file_id = relative_path
+        if self.graph.has_node(file_id):
+            file_depth = self.graph.nodes[file_id]["_depth"]
+        else:
+            file_depth = relative_path.count("/") + 1
+            self.graph.add_node(
+                file_id,
+                type="file",
+                name=os.path.basename(relative_path),
+                path=relative_path,
+                _depth=file_depth
+            )
+
+        # Collect the AST and add its nodes/edges in one batch
+        nodes, edges = self._collect_nodes(flat, file_id, file_depth)
+        self.graph.add_nodes_from(nodes)
+        self.graph.add_edges_from(edges)
+
+    def _parse(self, parser: Any, path: str, source_code: bytes) -> Any:
+        """
+        Parse a file, reusing its previous tree when one is cached.
+        
+        The changed region is taken as everything between the longest common
+        prefix and suffix of the old and new source; the old tree is edited to
+        match and handed to the parser so only that region is re-parsed.
+        """
+        tree = None
+        cached = self._tree_cache.pop(path, None)
+        if cached is not None:
+            old_source, old_tree = cached
+            try:
+                old_tree.edit(**_edit_range(old_source, source_code))
+                tree = parser.parse(source_code, old_tree)
+            except Exception as e:
+                print(f"Incremental parse failed for {path}, re-parsing: {e}")
+                tree = None
+        if tree is None:
+            tree = parser.parse(source_code)
+        
+        if tree:
+            self._tree_cache[path] = (source_code, tree)
+            if len(self._tree_cache) > _TREE_CACHE_SIZE:
+                self._tree_cache.popitem(last=False)
+        return tree
+
+    def _get_cached_ast(self, path: str, sha: bytes) -> Optional[List[List[Any]]]:
+        """Return the cached flattened AST for a file's content, if any."""
+        with self._ast_cache_lock:
+            row = self._ast_cache.execute(
+                "SELECT blob FROM ast_cache WHERE path = ? AND sha = ?", (path, sha)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _cache_ast(self, path: str, sha: bytes, flat: List[Tuple]) -> None:
+        """Store a file's flattened AST, replacing entries for older content."""
+        blob = json.dumps(flat, separators=(",", ":"))
+        with self._ast_cache_lock, self._ast_cache:
+            self._ast_cache.execute("DELETE FROM ast_cache WHERE path = ?", (path,))
+            self._ast_cache.execute(
+                "INSERT INTO ast_cache (path, sha, blob) VALUES (?, ?, ?)",
+                (path, sha, blob)
+            )
+
+    @staticmethod
+    def _flatten_ast(root: Any, source_code: bytes) -> List[Tuple]:
+        """
+        Flatten an AST into preorder rows.
+        
+        Walks the tree with an explicit stack so deeply nested sources
+        can't hit the interpreter's recursion limit.
         
-        # Add edge from parent
-        self.graph.add_edge(parent_id, node_id, type="contains")
+        Args:
+            root: Tree-sitter root node
+            source_code: Source code bytes
+            
+        Returns:
+            List of (type, name, start_row, start_col, end_row, end_col,
+            parent_index) rows, where parent_index is -1 for the root
+        """
+        flat = []
+        get_node_name = GraphBuilder._get_node_name
+        stack = [(root, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            index = len(flat)
+            flat.append((
+                node.type,
+                get_node_name(node, source_code),
+                node.start_point[0], node.start_point[1],
+                node.end_point[0], node.end_point[1],
+                parent_index
+            ))
+            
+            # Queue children (reversed so they pop in source order)
+            children = node.children
+            if children:
+                stack.extend((child, index) for child in reversed(children))
         
-        # Process children
-        for child in node.children:
-            self._process_ast_node(child, node_id, source_code)
+        return flat
 
-    def _get_node_name(self, node: Any, source_code: bytes) -> str:
+    def _collect_nodes(
+        self,
+        flat: List[Tuple],
+        file_id: str,
+        file_depth: int
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, str, Dict[str, Any]]]]:
+        """
+        Turn a flattened AST into node and edge lists ready for bulk insertion.
+        
+        Args:
+            flat: Preorder rows from _flatten_ast
+            file_id: ID of the file node the AST hangs from
+            file_depth: Depth of the file node
+            
+        Returns:
+            Tuple of (nodes, edges) for add_nodes_from/add_edges_from
+        """
+        nodes = []
+        edges = []
+        ids = []
+        depths = []
+        intern = sys.intern
+        for node_type, node_name, start_row, start_col, end_row, end_col, parent_index in flat:
+            # Types (and most names, which default to the type) repeat across
+            # every file; interning keeps one copy per distinct string
+            node_type = intern(node_type)
+            node_name = intern(node_name)
+            
+            if parent_index < 0:
+                parent_id, parent_depth = file_id, file_depth
+            else:
+                parent_id, parent_depth = ids[parent_index], depths[parent_index]
+            
+            # Node IDs sit two path segments below their parent
+            node_id = "/".join((parent_id, node_type, node_name))
+            depth = parent_depth + 2
+            ids.append(node_id)
+            depths.append(depth)
+            
+            nodes.append((node_id, {
+                "type": node_type,
+                "name": node_name,
+                "start_point": (start_row, start_col),
+                "end_point": (end_row, end_col),
+                "_depth": depth
+            }))
+            edges.append((parent_id, node_id, {"type": "contains"}))
+        
+        return nodes, edges
+
+    @staticmethod
+    def _get_node_name(node: Any, source_code: bytes) -> str:
         """Extract node name from source code."""
-        if node.type in ['function_definition', 'method_definition', 'class_definition']:
-            # Find the name node
-            for child in node.children:
-                if child.type == 'identifier':
-                    start = child.start_byte
-                    end = child.end_byte
-                    return source_code[start:end].decode('utf-8')
+        if node.type in _NAMED_NODE_TYPES:
+            # The grammar's "name" field finds the name without scanning children
+            name_node = node.child_by_field_name('name')
+            if name_node is None or name_node.type != 'identifier':
+                name_node = next(
+                    (child for child in node.children if child.type == 'identifier'),
+                    None
+                )
+            if name_node is not None:
+                return source_code[name_node.start_byte:name_node.end_byte].decode('utf-8', 'replace')
         return node.type
 
     def build_repository_graph(self, repo_structure: Dict[str, Any]) -> nx.DiGraph:
@@ -101,122 +397,152 @@ class GraphBuilder:
             NetworkX directed graph
         """
         self.graph.clear()
+        self._nodes_buf = []
+        self._edges_buf = []
         
         # Add repository node
         repo_id = repo_structure["id"]
-        self.graph.add_node(
-            repo_id,
-            type="repository",
-            name=repo_structure["name"],
-            url=repo_structure["url"],
-            branch=repo_structure["branch"]
-        )
+        self._nodes_buf.append((repo_id, {
+            "type": "repository",
+            "name": repo_structure["name"],
+            "url": repo_structure["url"],
+            "branch": repo_structure["branch"],
+            "_depth": 1
+        }))
         
         # Process folders
-        self._process_folders(repo_structure["folders"], repo_id)
+        self._process_folders(repo_structure["folders"], repo_id, 1)
         
         # Process files
         for file_info in repo_structure["files"]:
-            self._add_file_node(file_info, repo_id)
+            self._add_file_node(file_info, repo_id, 1)
         
+        self._flush()
         return self.graph
 
-    def _process_folders(self, folders: Dict[str, Any], parent_id: str):
+    def _process_folders(self, folders: Dict[str, Any], parent_id: str, parent_depth: int):
         """
-        Process folder structure recursively.
+        Process folder structure iteratively.
         
         Args:
             folders: Dictionary containing folder structure
             parent_id: ID of the parent node
+            parent_depth: Depth of the parent node
         """
-        for folder_name, folder_data in folders.items():
-            folder_id = f"{parent_id}/{folder_name}"
+        stack = [(folders, parent_id, parent_depth)]
+        while stack:
+            folders, parent_id, parent_depth = stack.pop()
+            depth = parent_depth + 1
             
-            # Add folder node
-            self.graph.add_node(
-                folder_id,
-                type="folder",
-                name=folder_name
-            )
-            
-            # Add edge from parent to folder
-            self.graph.add_edge(parent_id, folder_id, type="contains")
-            
-            # Process subfolders
-            self._process_folders(folder_data["folders"], folder_id)
+            # Reversed so subfolders pop in their original order
+            for folder_name, folder_data in reversed(list(folders.items())):
+                folder_id = f"{parent_id}/{folder_name}"
+                
+                # Add folder node
+                self._nodes_buf.append((folder_id, {
+                    "type": "folder",
+                    "name": folder_name,
+                    "_depth": depth
+                }))
+                
+                # Add edge from parent to folder
+                self._edges_buf.append((parent_id, folder_id, {"type": "contains"}))
+                
+                # Queue subfolders
+                stack.append((folder_data["folders"], folder_id, depth))
 
-    def _add_file_node(self, file_info: Dict[str, Any], parent_id: str):
+    def _add_file_node(self, file_info: Dict[str, Any], parent_id: str, parent_depth: int):
         """
         Add a file node to the graph.
         
         Args:
             file_info: Dictionary containing file information
             parent_id: ID of the parent node
+            parent_depth: Depth of the parent node
         """
         file_id = f"{parent_id}/{file_info['path']}"
         
         # Add file node
-        self.graph.add_node(
-            file_id,
-            type="file",
-            name=Path(file_info["path"]).name,
-            path=file_info["path"],
-            hash=file_info["hash"],
-            size=file_info["size"]
-        )
+        self._nodes_buf.append((file_id, {
+            "type": "file",
+            "name": os.path.basename(file_info["path"]),
+            "path": file_info["path"],
+            "hash": file_info["hash"],
+            "size": file_info["size"],
+            "_depth": parent_depth + file_info["path"].count("/") + 1
+        }))
         
         # Add edge from parent to file
-        self.graph.add_edge(parent_id, file_id, type="contains")
+        self._edges_buf.append((parent_id, file_id, {"type": "contains"}))
 
     def get_graph_data(self, level: int = 1) -> Dict[str, Any]:
         """
         Get graph data in a format suitable for visualization.
         
+        Collects iter_graph_data into lists; prefer iter_graph_data when the
+        result is serialized incrementally.
+        
         Args:
             level: Semantic zoom level (1: repo, 2: files, 3: code)
             
         Returns:
             Dictionary containing nodes and edges
         """
-        nodes = []
-        edges = []
+        result = {"nodes": [], "edges": []}
+        append_node = result["nodes"].append
+        append_edge = result["edges"].append
+        for kind, item in self.iter_graph_data(level):
+            if kind == "node":
+                append_node(item)
+            else:
+                append_edge(item)
+        return result
+
+    def iter_graph_data(self, level: int = 1) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield graph data for visualization one element at a time.
+        
+        All nodes are yielded before any edge, so a consumer can stream them
+        straight into a response without holding the whole graph in memory.
         
-        for node_id, node_data in self.graph.nodes(data=True):
-            if self._should_include_node(node_id, level):
-                nodes.append({
-                    "id": node_id,
-                    "type": node_data["type"],
-                    "name": node_data.get("name", ""),
-                    "data": {k: v for k, v in node_data.items() if k not in ["type", "name"]}
-                })
-        
-        for source, target, edge_data in self.graph.edges(data=True):
-            if self._should_include_edge(source, target, level):
-                edges.append({
+        Args:
+            level: Semantic zoom level (1: repo, 2: files, 3: code)
+            
+        Yields:
+            ("node", node_dict) pairs followed by ("edge", edge_dict) pairs
+        """
+        # Levels without a depth cap include everything, so skip the filter;
+        # otherwise only visit the shallow nodes and their outgoing edges
+        max_depth = _LEVEL_MAX_DEPTH.get(level)
+        if max_depth is None:
+            node_ids = self.graph.nodes
+            edge_iter = self.graph.edges(data=True)
+            included = None
+        else:
+            node_ids = [
+                node_id for node_id, depth in self.graph.nodes(data="_depth")
+                if depth <= max_depth
+            ]
+            edge_iter = self.graph.edges(node_ids, data=True)
+            included = set(node_ids)
+        
+        graph_nodes = self.graph.nodes
+        for node_id in node_ids:
+            node_data = graph_nodes[node_id]
+            yield "node", {
+                "id": node_id,
+                "type": node_data["type"],
+                "name": node_data.get("name", ""),
+                "data": {k: v for k, v in node_data.items() if k not in _NON_DATA_ATTRS}
+            }
+        
+        for source, target, edge_data in edge_iter:
+            if included is None or target in included:
+                yield "edge", {
                     "source": source,
                     "target": target,
                     "type": edge_data.get("type", "related")
-                })
-        
-        return {
-            "nodes": nodes,
-            "edges": edges
-        }
-
-    def _should_include_node(self, node_id: str, level: int) -> bool:
-        """Determine if a node should be included at the given level."""
-        parts = node_id.split("/")
-        if level == 1:
-            return len(parts) <= 2  # Repository and top-level folders
-        elif level == 2:
-            return len(parts) <= 3  # Include files
-        else:
-            return True  # Include everything
-
-    def _should_include_edge(self, source: str, target: str, level: int) -> bool:
-        """Determine if an edge should be included at the given level."""
-        return (self._should_include_node(source, level) and
-                self._should_include_node(target, level))
+                }
 
     def get_node_details(self, node_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -236,5 +562,5 @@ class GraphBuilder:
             "id": node_id,
             "type": node_data["type"],
             "name": node_data.get("name", ""),
-            "data": {k: v for k, v in node_data.items() if k not in ["type", "name"]}
+            "data": {k: v for k, v in node_data.items() if k not in _NON_DATA_ATTRS}
         } 
\ No newline at end of file
@@ -2,16 +2,31 @@ import os
 import json
 import hashlib
 import asyncio
-from pathlib import Path
+import random
+from collections import defaultdict
+from statistics import fmean
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import openai
+import tiktoken
 from datetime import datetime
 import sqlite3
 import aiosqlite
 
 from .code_analyzer import CodeChunk, FileSummary, ModuleSummary
 
+# Prompt for chunk-level one-liners, filled in by _create_chunk_summary_prompt
+_CHUNK_PROMPT_TEMPLATE = """Generate a concise one-line summary (max 10 words) for this {ast_type}{context}:
+
+File: {name}
+Lines {start}-{end}
+{docstring}
+
+Code:
+{code}...
+
+Summary (one line, max 10 words):"""
+
 
 @dataclass
 class ChunkSummary:
@@ -73,14 +88,28 @@ class HierarchicalSummarizer:
         # Database for caching
         self.db_path = os.path.join(self.cache_dir, "summaries.db")
         self._init_database()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        
+        # Chunk summaries waiting to be written by flush_chunks()
+        self._pending_chunks: List[Tuple] = []
         
         # Model configurations
         self.cheap_model = "gpt-3.5-turbo"  # For chunk-level summaries
         self.powerful_model = "gpt-4o-mini"  # For higher-level summaries
         
+        # Concurrent chunk-summary requests, and retries when rate limited
+        self.max_concurrent_requests = 20
+        self.max_rate_limit_retries = 5
+        
+        # Chunk prompts longer than this are not sent; the fallback summary is used
+        self.max_chunk_prompt_tokens = 1000
+        self._tokenizer = None
+        
     def _init_database(self):
         """Initialize SQLite database for caching summaries."""
         conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS chunk_summaries (
                 chunk_hash TEXT PRIMARY KEY,
@@ -117,16 +146,54 @@ class HierarchicalSummarizer:
             self.openai_client = openai.AsyncOpenAI(api_key=self.openai_api_key)
         return self.openai_client
     
-    async def _get_cached_chunk_summary(self, chunk_hash: str) -> Optional[ChunkSummary]:
-        """Retrieve cached chunk summary by hash."""
-        async with aiosqlite.connect(self.db_path) as db:
+    def _get_tokenizer(self):
+        """Get the cheap model's tokenizer, loading it once; None if unavailable."""
+        if self._tokenizer is None:
+            try:
+                try:
+                    self._tokenizer = tiktoken.encoding_for_model(self.cheap_model)
+                except KeyError:
+                    # Fallback to a common encoding
+                    self._tokenizer = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # Encodings are downloaded on first use; carry on without one offline
+                print(f"⚠️  Tokenizer unavailable, prompt sizes won't be checked: {e}")
+                self._tokenizer = False
+        return self._tokenizer or None
+    
+    async def _get_db(self) -> aiosqlite.Connection:
+        """Get the shared cache connection, opening it on first use."""
+        if self._db is None:
+            async with self._db_lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(self.db_path)
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                    await db.execute("PRAGMA temp_store=MEMORY")
+                    self._db = db
+        return self._db
+    
+    async def close(self):
+        """Flush pending summaries and close the cache connection."""
+        await self.flush_chunks()
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+    
+    async def _get_cached_chunk_summaries(self, chunk_hashes: List[str]) -> Dict[str, ChunkSummary]:
+        """Retrieve cached chunk summaries for many hashes, keyed by hash."""
+        db = await self._get_db()
+        cached = {}
+        
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(chunk_hashes), 500):
+            batch = chunk_hashes[i:i + 500]
             async with db.execute(
-                "SELECT * FROM chunk_summaries WHERE chunk_hash = ?", 
-                (chunk_hash,)
+                "SELECT chunk_hash, chunk_id, summary, confidence, model_used, timestamp, token_count "
+                f"FROM chunk_summaries WHERE chunk_hash IN ({','.join('?' * len(batch))})",
+                batch
             ) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    return ChunkSummary(
+                async for row in cursor:
+                    cached[row[0]] = ChunkSummary(
                         chunk_id=row[1],
                         chunk_hash=row[0],
                         summary=row[2],
@@ -135,52 +202,84 @@ class HierarchicalSummarizer:
                         timestamp=datetime.fromisoformat(row[5]),
                         token_count=row[6]
                     )
-                return None
+        return cached
     
     async def _cache_chunk_summary(self, summary: ChunkSummary):
-        """Cache a chunk summary."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO chunk_summaries 
-                (chunk_hash, chunk_id, summary, confidence, model_used, timestamp, token_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                summary.chunk_hash,
-                summary.chunk_id,
-                summary.summary,
-                summary.confidence,
-                summary.model_used,
-                summary.timestamp.isoformat(),
-                summary.token_count
-            ))
-            await db.commit()
+        """Queue a chunk summary to be cached by the next flush_chunks()."""
+        self._pending_chunks.append((
+            summary.chunk_hash,
+            summary.chunk_id,
+            summary.summary,
+            summary.confidence,
+            summary.model_used,
+            summary.timestamp.isoformat(),
+            summary.token_count
+        ))
+    
+    async def flush_chunks(self):
+        """Write all queued chunk summaries in a single transaction."""
+        if not self._pending_chunks:
+            return
+        rows, self._pending_chunks = self._pending_chunks, []
+        db = await self._get_db()
+        await db.executemany("""
+            INSERT OR REPLACE INTO chunk_summaries 
+            (chunk_hash, chunk_id, summary, confidence, model_used, timestamp, token_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await db.commit()
     
     async def _generate_chunk_summary(self, chunk: CodeChunk) -> ChunkSummary:
         """Generate a one-liner summary for a code chunk using the cheap model."""
-        # Check cache first
-        cached = await self._get_cached_chunk_summary(chunk.hash)
-        if cached:
-            print(f"📋 Using cached summary for {chunk.id}")
-            return cached
-        
         # Create prompt for one-liner summary
+        system_prompt = "You are a code analysis expert. Generate concise one-line summaries."
         prompt = self._create_chunk_summary_prompt(chunk)
         
         try:
+            tokenizer = self._get_tokenizer()
+            prompt_tokens = 0
+            if tokenizer:
+                prompt_tokens = len(tokenizer.encode(system_prompt)) + len(tokenizer.encode(prompt))
+                if prompt_tokens > self.max_chunk_prompt_tokens:
+                    raise ValueError(f"prompt too long ({prompt_tokens} tokens)")
+            
             print(f"🤖 Generating summary for chunk {chunk.id}")
             client = self._get_openai_client()
-            response = await client.chat.completions.create(
-                model=self.cheap_model,
-                messages=[
-                    {"role": "system", "content": "You are a code analysis expert. Generate concise one-line summaries."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=50,
-                temperature=0.1
-            )
+            for retry in range(self.max_rate_limit_retries + 1):
+                try:
+                    stream = await client.chat.completions.create(
+                        model=self.cheap_model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=50,
+                        temperature=0.1,
+                        stream=True
+                    )
+                    break
+                except openai.RateLimitError:
+                    if retry == self.max_rate_limit_retries:
+                        raise
+                    # Exponential backoff with jitter
+                    await asyncio.sleep(2 ** retry + random.random())
             
-            summary_text = response.choices[0].message.content.strip()
-            token_count = response.usage.total_tokens
+            # Stop reading as soon as the first line is complete
+            parts = []
+            try:
+                async for event in stream:
+                    if not event.choices:
+                        continue
+                    delta = event.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        if "\n" in "".join(parts).lstrip():
+                            break
+            finally:
+                await stream.response.aclose()
+            
+            summary_text = "".join(parts).strip().split("\n", 1)[0]
+            token_count = prompt_tokens + len(tokenizer.encode(summary_text)) if tokenizer else 0
             
             # Create summary object
             summary = ChunkSummary(
@@ -195,7 +294,7 @@ class HierarchicalSummarizer:
             
             # Cache the summary
             await self._cache_chunk_summary(summary)
-            print(f"✅ Generated and cached summary for {chunk.id}")
+            print(f"✅ Generated summary for {chunk.id}")
             
             return summary
             
@@ -205,7 +304,7 @@ class HierarchicalSummarizer:
             return ChunkSummary(
                 chunk_id=chunk.id,
                 chunk_hash=chunk.hash,
-                summary=f"{chunk.ast_type} in {Path(chunk.path).name}",
+                summary=f"{chunk.ast_type} in {os.path.basename(chunk.path)}",
                 confidence=0.3,
                 model_used="fallback",
                 timestamp=datetime.now(),
@@ -222,34 +321,40 @@ class HierarchicalSummarizer:
         if chunk.docstring:
             docstring_context = f"\nDocstring: {chunk.docstring[:100]}..."
         
-        return f"""Generate a concise one-line summary (max 10 words) for this {chunk.ast_type}{context}:
-
-File: {Path(chunk.path).name}
-Lines {chunk.start_line}-{chunk.end_line}
-{docstring_context}
-
-Code:
-{chunk.content[:500]}...
-
-Summary (one line, max 10 words):"""
+        return _CHUNK_PROMPT_TEMPLATE.format(
+            ast_type=chunk.ast_type,
+            context=context,
+            name=os.path.basename(chunk.path),
+            start=chunk.start_line,
+            end=chunk.end_line,
+            docstring=docstring_context,
+            code=chunk.content[:500]
+        )
     
     async def summarize_chunks(self, chunks: List[CodeChunk]) -> List[ChunkSummary]:
         """Generate summaries for a list of chunks."""
         print(f"📝 Generating summaries for {len(chunks)} chunks...")
         
-        # Process chunks in batches to avoid rate limiting
-        batch_size = 5
-        summaries = []
+        # Look up every chunk in the cache at once; only misses hit the API
+        cached = await self._get_cached_chunk_summaries([chunk.hash for chunk in chunks])
+        misses = [chunk for chunk in chunks if chunk.hash not in cached]
+        print(f"📋 Using cached summaries for {len(chunks) - len(misses)} chunks")
         
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            batch_tasks = [self._generate_chunk_summary(chunk) for chunk in batch]
-            batch_summaries = await asyncio.gather(*batch_tasks)
-            summaries.extend(batch_summaries)
-            
-            # Small delay between batches
-            if i + batch_size < len(chunks):
-                await asyncio.sleep(0.5)
+        # Summarize misses concurrently, bounded so we stay within rate limits
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        
+        async def summarize(chunk: CodeChunk) -> ChunkSummary:
+            async with semaphore:
+                summary = await self._generate_chunk_summary(chunk)
+            if len(self._pending_chunks) >= 100:
+                await self.flush_chunks()
+            return summary
+        
+        miss_summaries = await asyncio.gather(*(summarize(chunk) for chunk in misses))
+        await self.flush_chunks()
+        generated = {chunk.hash: summary for chunk, summary in zip(misses, miss_summaries)}
+        
+        summaries = [cached.get(chunk.hash) or generated[chunk.hash] for chunk in chunks]
         
         print(f"✅ Generated {len(summaries)} chunk summaries")
         return summaries
@@ -265,7 +370,7 @@ Summary (one line, max 10 words):"""
             return HierarchicalSummary(
                 level="file",
                 path=file_path,
-                summary=f"Empty file: {Path(file_path).name}",
+                summary=f"Empty file: {os.path.basename(file_path)}",
                 components=[]
             )
         
@@ -275,9 +380,12 @@ Summary (one line, max 10 words):"""
                 key=lambda cs: centrality_scores.get(cs.chunk_id, 0.0),
                 reverse=True
             )
+            # Sorted descending, so the head carries the file's top centrality
+            top_centrality = centrality_scores.get(chunk_summaries[0].chunk_id, 0.0)
         else:
             # Fallback: sort by chunk ID which contains line numbers
             chunk_summaries.sort(key=lambda cs: cs.chunk_id)
+            top_centrality = 0.0
         
         # Create prompt for file-level summary
         chunk_list = "\n".join([
@@ -286,7 +394,7 @@ Summary (one line, max 10 words):"""
         
         prompt = f"""Generate a comprehensive summary for this file based on its components:
 
-File: {Path(file_path).name}
+File: {os.path.basename(file_path)}
 Components ({len(chunk_summaries)} total):
 {chunk_list}
 
@@ -320,7 +428,7 @@ Summary:"""
             path=file_path,
             summary=summary_text,
             components=[cs.chunk_id for cs in chunk_summaries],
-            centrality_score=max([centrality_scores.get(cs.chunk_id, 0.0) for cs in chunk_summaries], default=0.0),
+            centrality_score=top_centrality,
             importance_score=len(chunk_summaries) / 10.0  # Simple importance based on chunk count
         )
     
@@ -334,7 +442,7 @@ Summary:"""
             return HierarchicalSummary(
                 level="directory",
                 path=dir_path,
-                summary=f"Empty directory: {Path(dir_path).name}",
+                summary=f"Empty directory: {os.path.basename(dir_path)}",
                 components=[]
             )
         
@@ -342,13 +450,13 @@ Summary:"""
         file_summaries.sort(key=lambda fs: fs.importance_score, reverse=True)
         
         file_list = "\n".join([
-            f"- {Path(fs.path).name}: {fs.summary[:100]}..."
+            f"- {os.path.basename(fs.path)}: {fs.summary[:100]}..."
             for fs in file_summaries[:8]  # Top 8 files
         ])
         
         prompt = f"""Generate a summary for this directory based on its files:
 
-Directory: {Path(dir_path).name}
+Directory: {os.path.basename(dir_path)}
 Files ({len(file_summaries)} total):
 {file_list}
 
@@ -382,7 +490,7 @@ Summary:"""
             path=dir_path,
             summary=summary_text,
             components=[fs.path for fs in file_summaries],
-            importance_score=sum(fs.importance_score for fs in file_summaries) / len(file_summaries)
+            importance_score=fmean(fs.importance_score for fs in file_summaries)
         )
     
     async def generate_hierarchical_summary(
@@ -403,14 +511,10 @@ Summary:"""
         chunk_summaries = await self.summarize_chunks(chunks)
         
         # Step 2: Group chunks by file and generate file summaries
-        chunks_by_file = {}
+        chunks_by_file = defaultdict(list)
         for chunk_summary in chunk_summaries:
             # Extract file path from chunk_id (format: path:start:end)
-            chunk_id = chunk_summary.chunk_id
-            file_path = ':'.join(chunk_id.split(':')[:-2])  # Remove :start:end
-            
-            if file_path not in chunks_by_file:
-                chunks_by_file[file_path] = []
+            file_path = chunk_summary.chunk_id.rsplit(':', 2)[0]  # Remove :start:end
             chunks_by_file[file_path].append(chunk_summary)
         
         print(f"📁 Generating summaries for {len(chunks_by_file)} files...")
@@ -424,11 +528,9 @@ Summary:"""
             file_summaries.append(file_summary)
         
         # Step 3: Group files by directory and generate directory summaries
-        files_by_dir = {}
+        files_by_dir = defaultdict(list)
         for file_summary in file_summaries:
-            dir_path = str(Path(file_summary.path).parent)
-            if dir_path not in files_by_dir:
-                files_by_dir[dir_path] = []
+            dir_path = os.path.dirname(file_summary.path) or "."
             files_by_dir[dir_path].append(file_summary)
         
         print(f"📂 Generating summaries for {len(files_by_dir)} directories...")
@@ -473,7 +575,7 @@ Summary:"""
         directory_summaries.sort(key=lambda ds: ds.importance_score, reverse=True)
         
         dir_list = "\n".join([
-            f"- {Path(ds.path).name}: {ds.summary[:150]}..."
+            f"- {os.path.basename(ds.path)}: {ds.summary[:150]}..."
             for ds in directory_summaries[:6]  # Top 6 directories
         ])
         
@@ -513,5 +615,5 @@ Summary:"""
             path=".",
             summary=summary_text,
             components=[ds.path for ds in directory_summaries],
-            importance_score=sum(ds.importance_score for ds in directory_summaries) / len(directory_summaries)
+            importance_score=fmean(ds.importance_score for ds in directory_summaries)
         ) 
\ No newline at end of file
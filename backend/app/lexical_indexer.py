@@ -4,6 +4,12 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Set
 from dataclasses import asdict
 import tempfile
+import threading
+import heapq
+from itertools import chain
+from operator import itemgetter
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from whoosh import fields, index
 from whoosh.index import open_dir
@@ -12,8 +18,70 @@ from whoosh.query import Term, And, Or, Phrase
 from whoosh.scoring import BM25F
 from whoosh.analysis import StandardAnalyzer, KeywordAnalyzer
 from whoosh.filedb.filestore import FileStorage
+from whoosh.writing import CLEAR
 
-from .code_analyzer import CodeChunk, FileSummary, ModuleSummary
+from .code_analyzer import AnalysisCancelled, CodeChunk, FileSummary, ModuleSummary, check_cancelled
+
+# Identifiers of three or more characters in most C-like languages and Python
+_SYMBOL_RE = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]{2,}\b')
+
+# Language keywords never indexed as symbols (compared lowercased)
+KEYWORDS = frozenset({
+    'if', 'else', 'for', 'while', 'do', 'try', 'catch', 'finally',
+    'function', 'class', 'def', 'var', 'let', 'const', 'return',
+    'import', 'from', 'as', 'export', 'default', 'public', 'private',
+    'protected', 'static', 'async', 'await', 'true', 'false', 'null',
+    'undefined', 'this', 'self', 'super', 'new', 'delete', 'typeof',
+    'instanceof', 'in', 'of', 'and', 'or', 'not', 'is', 'None',
+    'True', 'False', 'with', 'yield', 'lambda', 'pass', 'break',
+    'continue', 'raise', 'except', 'assert', 'global', 'nonlocal'
+})
+
+# Line comments (// for JavaScript/TypeScript, # for Python)
+_COMMENT_SINGLE_RE = re.compile(r'(?://|#).*$', re.MULTILINE)
+
+# Block comments (/* */) and Python docstrings (""" """ and ''' ''')
+_COMMENT_MULTI_RE = re.compile(r'/\*.*?\*/|""".*?"""|\'\'\'.*?\'\'\'', re.DOTALL)
+
+# Substrings that every comment match contains, for a cheap pre-check
+COMMENT_MARKERS = ('#', '//', '/*', '"""', "'''")
+
+# Python imports: optional "from X" plus the imported names
+_PY_IMPORT_RE = re.compile(r'(?:from\s+(\S+)\s+)?import\s+([^\n]+)')
+
+# JavaScript/TypeScript "import ... from '...'" and bare ES6 "import '...'"
+_JS_IMPORT_RE = re.compile(r'import\s+(?:\{[^}]+\}|\S+)\s+from\s+[\'"]([^\'"]+)[\'"]')
+_ES6_IMPORT_RE = re.compile(r'import\s+[\'"]([^\'"]+)[\'"]')
+
+# Index writer tuning: at most this many indexing processes, each allowed this
+# many MB for sorting postings before it spills a run to disk
+WRITER_MAX_PROCS = 4
+WRITER_LIMIT_MB = 512
+
+# Fields searched by free-text BM25 queries
+BM25_FIELDS = ["content", "symbols", "comments", "docstring", "parent_symbol"]
+
+# Symbol lookups answered from memory per index generation (LRU entries)
+SYMBOL_CACHE_SIZE = 1024
+
+
+def _hit_to_dict(hit, search_type: str) -> Dict[str, Any]:
+    """Convert a Whoosh hit into a search result dict."""
+    # Index the stored-field dict directly rather than going through
+    # Hit.__getitem__ for each field
+    stored = hit.fields()
+    return {
+        'id': stored['id'],
+        'path': stored['path'],
+        'content': stored['content'],
+        'ast_type': stored['ast_type'],
+        'start_line': stored['start_line'],
+        'end_line': stored['end_line'],
+        'parent_symbol': stored['parent_symbol'],
+        'docstring': stored['docstring'],
+        'score': hit.score,
+        'search_type': search_type
+    }
 
 
 class LexicalIndexer:
@@ -47,6 +115,14 @@ class LexicalIndexer:
         
         self.ix = None
         self._create_or_open_index()
+        
+        # Query parser and searcher are reused across queries; the searcher is
+        # refreshed only when a commit produces a new index generation
+        self._bm25_parser = MultifieldParser(BM25_FIELDS, self.ix.schema) if self.ix else None
+        self._searcher = None
+        self._symbol_cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._searcher_lock = threading.RLock()
+        self._writer_lock = threading.Lock()
     
     def _create_or_open_index(self):
         """Create a new index or open existing one."""
@@ -71,45 +147,19 @@ class LexicalIndexer:
         """Extract identifiers/symbols from code content."""
         # Simple regex-based symbol extraction
         # This catches most identifiers in various languages
-        symbol_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
-        symbols = set(re.findall(symbol_pattern, content))
+        symbols = set(_SYMBOL_RE.findall(content))
         
-        # Filter out common keywords and short symbols
-        keywords = {
-            'if', 'else', 'for', 'while', 'do', 'try', 'catch', 'finally',
-            'function', 'class', 'def', 'var', 'let', 'const', 'return',
-            'import', 'from', 'as', 'export', 'default', 'public', 'private',
-            'protected', 'static', 'async', 'await', 'true', 'false', 'null',
-            'undefined', 'this', 'self', 'super', 'new', 'delete', 'typeof',
-            'instanceof', 'in', 'of', 'and', 'or', 'not', 'is', 'None',
-            'True', 'False', 'with', 'yield', 'lambda', 'pass', 'break',
-            'continue', 'raise', 'except', 'assert', 'global', 'nonlocal'
-        }
-        
-        return {s for s in symbols if len(s) > 2 and s.lower() not in keywords}
+        # Filter out common keywords (short symbols never match the pattern)
+        return {s for s in symbols if s.lower() not in KEYWORDS}
     
     def _extract_comments(self, content: str) -> str:
         """Extract comments from code content."""
-        comments = []
-        
-        # Single line comments (// and #)
-        single_line_patterns = [
-            r'//.*$',  # JavaScript/TypeScript
-            r'#.*$',   # Python
-        ]
+        # Every comment pattern starts with one of these markers
+        if not any(marker in content for marker in COMMENT_MARKERS):
+            return ''
         
-        # Multi-line comments (/* */ and """ """)
-        multi_line_patterns = [
-            r'/\*.*?\*/',  # JavaScript/TypeScript
-            r'""".*?"""',  # Python docstrings
-            r"'''.*?'''",  # Python docstrings
-        ]
-        
-        for pattern in single_line_patterns:
-            comments.extend(re.findall(pattern, content, re.MULTILINE))
-        
-        for pattern in multi_line_patterns:
-            comments.extend(re.findall(pattern, content, re.DOTALL))
+        comments = _COMMENT_SINGLE_RE.findall(content)
+        comments.extend(_COMMENT_MULTI_RE.findall(content))
         
         return ' '.join(comments)
     
@@ -117,8 +167,12 @@ class LexicalIndexer:
         """Extract import statements from code content."""
         imports = set()
         
+        # Every import pattern needs the literal keyword; most chunks lack it
+        if 'import' not in content:
+            return imports
+        
         # Python imports
-        python_imports = re.findall(r'(?:from\s+(\S+)\s+)?import\s+([^\n]+)', content)
+        python_imports = _PY_IMPORT_RE.findall(content)
         for from_module, import_items in python_imports:
             if from_module:
                 imports.add(from_module)
@@ -127,57 +181,114 @@ class LexicalIndexer:
             imports.update(items)
         
         # JavaScript/TypeScript imports
-        js_imports = re.findall(r'import\s+(?:{[^}]+}|\S+)\s+from\s+[\'"]([^\'"]+)[\'"]', content)
+        js_imports = _JS_IMPORT_RE.findall(content)
         imports.update(js_imports)
         
         # ES6 imports
-        es6_imports = re.findall(r'import\s+[\'"]([^\'"]+)[\'"]', content)
+        es6_imports = _ES6_IMPORT_RE.findall(content)
         imports.update(es6_imports)
         
         return imports
     
-    def index_chunks(self, chunks: List[CodeChunk]) -> None:
-        """Index a list of code chunks."""
+    @contextmanager
+    def bulk_writer(self):
+        """
+        Open one writer for a whole ingest and commit it once on exit.
+        
+        Spreads indexing over the available CPUs and gives each one enough
+        memory to sort postings without spilling runs to disk. The writer is
+        cancelled if the block raises.
+        """
+        procs = min(os.cpu_count() or 1, WRITER_MAX_PROCS)
+        # Whoosh allows one writer at a time; wait our turn rather than fail
+        with self._writer_lock:
+            writer = self.ix.writer(
+                procs=procs,
+                limitmb=WRITER_LIMIT_MB,
+                # Keep each process's segment rather than merging them all at commit
+                multisegment=procs > 1,
+            )
+            try:
+                yield writer
+            except BaseException:
+                writer.cancel()
+                raise
+            writer.commit()
+    
+    def _add_chunks(
+        self,
+        writer,
+        chunks: List[CodeChunk],
+        cancel_event: Optional[threading.Event] = None
+    ) -> None:
+        """Add code chunks to an open writer, raising AnalysisCancelled if cancel_event is set."""
+        add_document = writer.add_document
+        for chunk in chunks:
+            check_cancelled(cancel_event)
+            # Extract additional searchable content
+            symbols = " ".join(self._extract_symbols(chunk.content))
+            comments = self._extract_comments(chunk.content)
+            imports = self._extract_imports(chunk.content)
+            
+            # Add document to index
+            add_document(
+                id=chunk.id,
+                path=chunk.path,
+                content=chunk.content,
+                ast_type=chunk.ast_type,
+                start_line=chunk.start_line,
+                end_line=chunk.end_line,
+                parent_symbol=chunk.parent_symbol or "",
+                docstring=chunk.docstring or "",
+                
+                # Additional fields
+                symbols=symbols,
+                comments=comments,
+                imports=" ".join(imports),
+                
+                # Exact match fields
+                exact_content=chunk.content,
+                exact_symbols=symbols,
+            )
+    
+    def index_chunks(
+        self,
+        chunks: List[CodeChunk],
+        cancel_event: Optional[threading.Event] = None
+    ) -> None:
+        """Index a list of code chunks.
+        
+        If cancel_event is set before the writer commits, the writer is
+        cancelled and AnalysisCancelled is raised; none of the chunks are kept.
+        """
         if not self.ix:
             return
         
-        writer = self.ix.writer()
-        
         try:
-            for chunk in chunks:
-                # Extract additional searchable content
-                symbols = self._extract_symbols(chunk.content)
-                comments = self._extract_comments(chunk.content)
-                imports = self._extract_imports(chunk.content)
-                
-                # Add document to index
-                writer.add_document(
-                    id=chunk.id,
-                    path=chunk.path,
-                    content=chunk.content,
-                    ast_type=chunk.ast_type,
-                    start_line=chunk.start_line,
-                    end_line=chunk.end_line,
-                    parent_symbol=chunk.parent_symbol or "",
-                    docstring=chunk.docstring or "",
-                    
-                    # Additional fields
-                    symbols=" ".join(symbols),
-                    comments=comments,
-                    imports=" ".join(imports),
-                    
-                    # Exact match fields
-                    exact_content=chunk.content,
-                    exact_symbols=" ".join(symbols),
-                )
-            
-            writer.commit()
+            with self.bulk_writer() as writer:
+                self._add_chunks(writer, chunks, cancel_event)
+                check_cancelled(cancel_event)
             print(f"Indexed {len(chunks)} code chunks")
             
+        except AnalysisCancelled:
+            print("Indexing cancelled; discarded the uncommitted chunks")
+            raise
         except Exception as e:
-            writer.cancel()
             print(f"Error indexing chunks: {e}")
     
+    def _get_searcher(self):
+        """Return the shared searcher, refreshed if the index has changed."""
+        if self._searcher is None:
+            self._searcher = self.ix.searcher(weighting=BM25F())
+        else:
+            # Returns the same searcher while the generation is unchanged;
+            # after a commit it keeps the readers of segments that survived
+            searcher = self._searcher.refresh()
+            if searcher is not self._searcher:
+                self._symbol_cache.clear()
+            self._searcher = searcher
+        return self._searcher
+    
     def search(
         self, 
         query: str, 
@@ -190,7 +301,8 @@ class LexicalIndexer:
         
         results = []
         
-        with self.ix.searcher(weighting=BM25F()) as searcher:
+        with self._searcher_lock:
+            searcher = self._get_searcher()
             if search_type == "exact":
                 results = self._exact_search(searcher, query, limit)
             elif search_type == "bm25":
@@ -200,14 +312,13 @@ class LexicalIndexer:
                 exact_results = self._exact_search(searcher, query, limit // 2)
                 bm25_results = self._bm25_search(searcher, query, limit // 2)
                 
-                # Merge and deduplicate
+                # Merge by score, keeping the first hit for each chunk id
                 seen_ids = set()
-                for result in exact_results + bm25_results:
-                    if result['id'] not in seen_ids:
-                        results.append(result)
-                        seen_ids.add(result['id'])
-                        if len(results) >= limit:
-                            break
+                unique_results = (
+                    result for result in chain(exact_results, bm25_results)
+                    if not (result['id'] in seen_ids or seen_ids.add(result['id']))
+                )
+                results = heapq.nlargest(limit, unique_results, key=itemgetter('score'))
         
         return results
     
@@ -220,18 +331,7 @@ class LexicalIndexer:
         exact_results = searcher.search(exact_query, limit=limit)
         
         for hit in exact_results:
-            results.append({
-                'id': hit['id'],
-                'path': hit['path'],
-                'content': hit['content'],
-                'ast_type': hit['ast_type'],
-                'start_line': hit['start_line'],
-                'end_line': hit['end_line'],
-                'parent_symbol': hit['parent_symbol'],
-                'docstring': hit['docstring'],
-                'score': hit.score,
-                'search_type': 'exact'
-            })
+            results.append(_hit_to_dict(hit, 'exact'))
         
         return results
     
@@ -239,29 +339,12 @@ class LexicalIndexer:
         """Perform BM25 search across multiple fields."""
         results = []
         
-        # Create multi-field parser
-        parser = MultifieldParser(
-            ["content", "symbols", "comments", "docstring", "parent_symbol"],
-            self.ix.schema
-        )
-        
         try:
-            parsed_query = parser.parse(query)
+            parsed_query = self._bm25_parser.parse(query)
             search_results = searcher.search(parsed_query, limit=limit)
             
             for hit in search_results:
-                results.append({
-                    'id': hit['id'],
-                    'path': hit['path'],
-                    'content': hit['content'],
-                    'ast_type': hit['ast_type'],
-                    'start_line': hit['start_line'],
-                    'end_line': hit['end_line'],
-                    'parent_symbol': hit['parent_symbol'],
-                    'docstring': hit['docstring'],
-                    'score': hit.score,
-                    'search_type': 'bm25'
-                })
+                results.append(_hit_to_dict(hit, 'bm25'))
                 
         except Exception as e:
             print(f"Error in BM25 search: {e}")
@@ -270,49 +353,41 @@ class LexicalIndexer:
     
     def search_by_symbol(self, symbol: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for chunks containing a specific symbol."""
-        with self.ix.searcher() as searcher:
-            # Search in exact symbols field
-            symbol_query = Term("exact_symbols", symbol)
-            results = searcher.search(symbol_query, limit=limit)
+        with self._searcher_lock:
+            searcher = self._get_searcher()
+            
+            # Symbol lookups repeat heavily while browsing; answer them from
+            # memory until the index changes
+            key = (symbol, limit)
+            cached = self._symbol_cache.pop(key, None)
+            if cached is None:
+                # Search in exact symbols field
+                symbol_query = Term("exact_symbols", symbol)
+                results = searcher.search(symbol_query, limit=limit)
+                cached = [_hit_to_dict(hit, 'symbol') for hit in results]
+            
+            self._symbol_cache[key] = cached
+            if len(self._symbol_cache) > SYMBOL_CACHE_SIZE:
+                self._symbol_cache.popitem(last=False)
             
-            return [{
-                'id': hit['id'],
-                'path': hit['path'],
-                'content': hit['content'],
-                'ast_type': hit['ast_type'],
-                'start_line': hit['start_line'],
-                'end_line': hit['end_line'],
-                'parent_symbol': hit['parent_symbol'],
-                'docstring': hit['docstring'],
-                'score': hit.score,
-                'search_type': 'symbol'
-            } for hit in results]
+            return [dict(result) for result in cached]
     
     def search_by_file(self, file_path: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get all chunks from a specific file."""
-        with self.ix.searcher() as searcher:
+        with self._searcher_lock:
+            searcher = self._get_searcher()
             file_query = Term("path", file_path)
             results = searcher.search(file_query, limit=limit, sortedby="start_line")
             
-            return [{
-                'id': hit['id'],
-                'path': hit['path'],
-                'content': hit['content'],
-                'ast_type': hit['ast_type'],
-                'start_line': hit['start_line'],
-                'end_line': hit['end_line'],
-                'parent_symbol': hit['parent_symbol'],
-                'docstring': hit['docstring'],
-                'score': hit.score,
-                'search_type': 'file'
-            } for hit in results]
+            return [_hit_to_dict(hit, 'file') for hit in results]
     
     def get_index_stats(self) -> Dict[str, Any]:
         """Get statistics about the index."""
         if not self.ix:
             return {}
         
-        with self.ix.searcher() as searcher:
+        with self._searcher_lock:
+            searcher = self._get_searcher()
             return {
                 'total_documents': searcher.doc_count(),
                 'index_dir': self.index_dir,
@@ -330,7 +405,8 @@ class LexicalIndexer:
             }
         
         try:
-            with self.ix.searcher() as searcher:
+            with self._searcher_lock:
+                searcher = self._get_searcher()
                 doc_count = searcher.doc_count()
                 
             # Try to get index size (approximate)
@@ -360,6 +436,7 @@ class LexicalIndexer:
     def clear_index(self) -> None:
         """Clear the entire index."""
         if self.ix:
-            writer = self.ix.writer()
-            writer.commit(mergetype='CLEAR')
+            with self._writer_lock:
+                writer = self.ix.writer()
+                writer.commit(mergetype=CLEAR)
             print("Index cleared") 
\ No newline at end of file
@@ -2,14 +2,22 @@ import os
 import logging
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
 import tempfile
 import shutil
 import asyncio
+import heapq
+import time
+import threading
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import aiosqlite
+import aiohttp
+import orjson
 from datetime import datetime
 
 # Configure logging
@@ -25,10 +33,21 @@ from .asana_manager import AsanaManager
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start Scout's components and release them on shutdown."""
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Scout Operational Intelligence API",
     description="AI-native operational intelligence for engineering teams - GitHub + Asana + Codebase insights",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
@@ -40,6 +59,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress graph, search and event payloads; level 5 gets nearly all of level
+# 9's ratio on JSON for a fraction of the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Global instances
 analyzer: Optional[CodeAnalyzer] = None
 github_manager: Optional[GitHubManager] = None
@@ -47,10 +70,101 @@ event_bus: Optional[EventBus] = None
 rule_engine: Optional[RuleEngine] = None
 asana_manager: Optional[AsanaManager] = None
 
-@app.on_event("startup")
+# Connections reused by the external service checks
+http_session: Optional[aiohttp.ClientSession] = None
+memgraph_probe_conn = None
+_memgraph_probe_lock = threading.Lock()
+MEMGRAPH_PROBE_TIMEOUT = 5.0
+HTTP_DNS_CACHE_SECONDS = 300
+
+# External service checks are cached so frequent /health probes don't hit
+# Qdrant and Memgraph every time
+SERVICES_CHECK_TTL = 10.0
+_services_cache: Dict[str, Any] = {"status": None, "checked_at": 0.0}
+_services_lock = asyncio.Lock()
+
+# Streamed graph responses are flushed in chunks of roughly this size
+GRAPH_STREAM_CHUNK_BYTES = 64 * 1024
+
+# /graph/centrality lists every node's metrics only for graphs up to this size;
+# beyond it the payload is megabytes of numbers next to the top-node lists
+CENTRALITY_ALL_METRICS_MAX_NODES = 1000
+
+# Stats and graph responses are cached as encoded JSON per endpoint, and stay
+# valid until the analyzer's version changes
+_response_cache: Dict[str, Tuple[int, bytes]] = {}
+
+# Analyses clone, parse and index whole repositories; running too many at once
+# exhausts memory and worker threads, so extra requests wait their turn
+analysis_semaphore = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_ANALYSES", "4")))
+
+async def run_analysis(
+    analyzer: CodeAnalyzer,
+    repo_path: Path,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """Analyze a repository with the given analyzer once an analysis slot is free.
+    
+    Stop it by setting cancel_event rather than cancelling the task: the slot
+    is then held until the analysis's worker thread has actually returned.
+    """
+    async with analysis_semaphore:
+        return await analyzer.analyze_repository(repo_path, cancel_event)
+
+def stream_graph_json(header: Dict[str, Any], nodes: Iterable[Dict[str, Any]],
+                      edges: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode {**header, "nodes": [...], "edges": [...]} piece by piece.
+
+    Nodes and edges are serialized one at a time and flushed in chunks, so the
+    whole document is never held in memory.
+    """
+    buf = bytearray(orjson.dumps(header)[:-1])
+    for key, items in ((b'"nodes"', nodes), (b'"edges"', edges)):
+        buf += b"," + key + b":["
+        first = True
+        for item in items:
+            if not first:
+                buf += b","
+            buf += orjson.dumps(item)
+            first = False
+            if len(buf) >= GRAPH_STREAM_CHUNK_BYTES:
+                yield bytes(buf)
+                buf.clear()
+        buf += b"]"
+    buf += b"}"
+    yield bytes(buf)
+
+def get_cached_response(key: str) -> Optional[Response]:
+    """Return the cached response for key if it was built for the current analyzer version."""
+    entry = _response_cache.get(key)
+    if entry is not None and entry[0] == analyzer.version:
+        return Response(content=entry[1], media_type="application/json")
+    return None
+
+def cache_response(key: str, version: int, payload: Dict[str, Any]) -> Response:
+    """Encode payload, cache it for version and return it."""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    _response_cache[key] = (version, body)
+    return Response(content=body, media_type="application/json")
+
+def stream_and_cache(key: str, version: int, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass a streamed body through, caching it for version once fully sent."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    _response_cache[key] = (version, b"".join(parts))
+
 async def startup_event():
     """Initialize Scout with all operational intelligence components."""
-    global analyzer, github_manager, event_bus, rule_engine, asana_manager
+    global analyzer, github_manager, event_bus, rule_engine, asana_manager, http_session
+    
+    # The default 10s DNS cache matches SERVICES_CHECK_TTL, so every probe
+    # would resolve the service hosts again
+    http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ttl_dns_cache=HTTP_DNS_CACHE_SECONDS),
+        timeout=aiohttp.ClientTimeout(total=5)
+    )
     
     # Load configuration from environment
     enable_vector = os.getenv("ENABLE_VECTOR_INDEXING", "false").lower() == "true"
@@ -58,20 +172,22 @@ async def startup_event():
     enable_lexical = os.getenv("ENABLE_LEXICAL_INDEXING", "true").lower() == "true"
     cache_dir = os.getenv("CACHE_DIR", "/tmp/halos_code_cache")
     
-    # Check for required services
-    services_status = await check_external_services()
+    # Initialize Event Bus while the external services are checked
+    event_db_path = os.getenv("EVENT_DB_PATH", "/tmp/scout_events.db")
+    event_bus = EventBus(db_path=event_db_path)
+    services_status, _ = await asyncio.gather(get_external_services(), event_bus.initialize())
     
     # Adjust configuration based on service availability
     if not services_status["openai"] and enable_vector:
-        print("⚠️  OpenAI API key not configured - disabling vector indexing")
+        logger.warning("⚠️  OpenAI API key not configured - disabling vector indexing")
         enable_vector = False
     
     if not services_status["qdrant"] and enable_vector:
-        print("⚠️  Qdrant not accessible - disabling vector indexing")
+        logger.warning("⚠️  Qdrant not accessible - disabling vector indexing")
         enable_vector = False
         
     if not services_status["memgraph"] and enable_dependency:
-        print("⚠️  Memgraph not accessible - disabling dependency graph")
+        logger.warning("⚠️  Memgraph not accessible - disabling dependency graph")
         enable_dependency = False
     
     analyzer = CodeAnalyzer(
@@ -86,11 +202,6 @@ async def startup_event():
     github_cache_dir = os.getenv("GITHUB_CACHE_DIR", "/tmp/halos_repos")
     github_manager = GitHubManager(cache_dir=github_cache_dir)
     
-    # Initialize Event Bus
-    event_db_path = os.getenv("EVENT_DB_PATH", "/tmp/scout_events.db")
-    event_bus = EventBus(db_path=event_db_path)
-    await event_bus.initialize()
-    
     # Initialize Rule Engine
     rule_engine = RuleEngine(event_bus=event_bus)
     
@@ -102,62 +213,128 @@ async def startup_event():
         sandbox=os.getenv("ASANA_SANDBOX", "false").lower() == "true"
     )
     
-    print(f"🧠 Scout Operational Intelligence API started")
-    print(f"📊 Services status: {services_status}")
-    print(f"⚙️  Configuration: Lexical={enable_lexical}, Vector={enable_vector}, Graph={enable_dependency}")
-    print(f"📁 GitHub cache: {github_cache_dir}")
-    print(f"📡 Event bus initialized at: {event_db_path}")
-    print(f"📏 Rule engine with {len(rule_engine.rules) if rule_engine else 0} rules")
-    print(f"📋 Asana integration: {'Configured' if asana_manager.access_token else 'Not configured'}")
-
-async def check_external_services() -> Dict[str, bool]:
-    """Check availability of external services."""
-    import aiohttp
+    logger.info("🧠 Scout Operational Intelligence API started")
+    logger.info(f"📊 Services status: {services_status}")
+    logger.info(f"⚙️  Configuration: Lexical={enable_lexical}, Vector={enable_vector}, Graph={enable_dependency}")
+    logger.info(f"📁 GitHub cache: {github_cache_dir}")
+    logger.info(f"📡 Event bus initialized at: {event_db_path}")
+    logger.info(f"📏 Rule engine with {len(rule_engine.rules) if rule_engine else 0} rules")
+    logger.info(f"📋 Asana integration: {'Configured' if asana_manager.access_token else 'Not configured'}")
+    logger.info(f"🔁 Event loop: {type(asyncio.get_running_loop()).__module__}")
+
+async def shutdown_event():
+    """Release long-lived resources."""
+    if event_bus:
+        await event_bus.close()
+    if analyzer and analyzer.hierarchical_summarizer:
+        await analyzer.hierarchical_summarizer.close()
+    if asana_manager:
+        await asana_manager.close()
+    if http_session:
+        await http_session.close()
+    if memgraph_probe_conn is not None:
+        memgraph_probe_conn.close()
+
+async def get_external_services(force: bool = False) -> Dict[str, bool]:
+    """Return external service availability, re-checking at most every SERVICES_CHECK_TTL seconds.
     
-    status = {
-        "openai": bool(os.getenv("OPENAI_API_KEY") and os.getenv("OPENAI_API_KEY") != "your_openai_api_key_here"),
-        "qdrant": False,
-        "memgraph": False
-    }
+    With force, the services are probed again regardless of the cached result's age.
+    """
+    requested_at = time.monotonic()
+    if not force and _services_cache["status"] is not None and requested_at - _services_cache["checked_at"] < SERVICES_CHECK_TTL:
+        return _services_cache["status"]
     
-    # Check Qdrant
+    # Concurrent callers share one check instead of each probing the services;
+    # a forced caller reuses a check that finished after it asked
+    async with _services_lock:
+        if force:
+            stale = _services_cache["status"] is None or _services_cache["checked_at"] < requested_at
+        else:
+            stale = _services_cache["status"] is None or time.monotonic() - _services_cache["checked_at"] >= SERVICES_CHECK_TTL
+        if stale:
+            _services_cache["status"] = await check_external_services()
+            _services_cache["checked_at"] = time.monotonic()
+    return _services_cache["status"]
+
+def _probe_memgraph() -> bool:
+    """Check Memgraph with a trivial query over a reused connection."""
+    # A timed-out probe may still be stuck connecting in its thread. Report
+    # Memgraph unavailable until it returns instead of parking more threads
+    # behind it in the default executor that analyses and git also run on
+    if not _memgraph_probe_lock.acquire(blocking=False):
+        return False
     try:
-        qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-        qdrant_api_key = os.getenv("QDRANT_API_KEY")
-        headers = {"api-key": qdrant_api_key} if qdrant_api_key else {}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{qdrant_url}/collections", headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                status["qdrant"] = response.status == 200
-    except:
-        pass
+        return _run_memgraph_probe()
+    finally:
+        _memgraph_probe_lock.release()
+
+def _run_memgraph_probe() -> bool:
+    global memgraph_probe_conn
     
-    # Check Memgraph
-    try:
-        import pymgclient
+    if memgraph_probe_conn is None:
+        # Imported here so the driver only loads once a probe actually connects
+        import mgclient
+        
         host = os.getenv("MEMGRAPH_HOST", "localhost")
         port = int(os.getenv("MEMGRAPH_PORT", "7687"))
         username = os.getenv("MEMGRAPH_USERNAME")
         password = os.getenv("MEMGRAPH_PASSWORD")
         
         # Use SSL for cloud connections
-        sslmode = pymgclient.MG_SSLMODE_REQUIRE if host != "localhost" else pymgclient.MG_SSLMODE_DISABLE
+        sslmode = mgclient.MG_SSLMODE_REQUIRE if host != "localhost" else mgclient.MG_SSLMODE_DISABLE
         
-        connection = pymgclient.Connection(
+        memgraph_probe_conn = mgclient.connect(
             host=host, 
             port=port, 
             username=username, 
             password=password,
             sslmode=sslmode
         )
-        connection.execute("RETURN 1")
-        status["memgraph"] = True
-        connection.close()
-    except:
-        pass
+    
+    try:
+        cursor = memgraph_probe_conn.cursor()
+        cursor.execute("RETURN 1")
+        cursor.fetchall()
+        cursor.close()
+    except Exception:
+        # Drop the broken connection so the next check reconnects
+        memgraph_probe_conn.close()
+        memgraph_probe_conn = None
+        raise
+    return True
+
+async def check_external_services() -> Dict[str, bool]:
+    """Check availability of external services."""
+    status = {
+        "openai": bool(os.getenv("OPENAI_API_KEY") and os.getenv("OPENAI_API_KEY") != "your_openai_api_key_here"),
+        "qdrant": False,
+        "memgraph": False
+    }
+    
+    # Probe both services at once; an unreachable service counts as unavailable
+    qdrant, memgraph = await asyncio.gather(
+        _check_qdrant(), _check_memgraph(), return_exceptions=True
+    )
+    status["qdrant"] = qdrant is True
+    status["memgraph"] = memgraph is True
     
     return status
 
+async def _check_qdrant() -> bool:
+    """Check that Qdrant answers its collections endpoint."""
+    qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
+    qdrant_api_key = os.getenv("QDRANT_API_KEY")
+    headers = {"api-key": qdrant_api_key} if qdrant_api_key else {}
+    
+    async with http_session.get(f"{qdrant_url}/collections", headers=headers) as response:
+        return response.status == 200
+
+async def _check_memgraph() -> bool:
+    """Check Memgraph without blocking the event loop."""
+    # mgclient is a blocking driver with no connect timeout, so run it in a
+    # thread and stop waiting after MEMGRAPH_PROBE_TIMEOUT seconds
+    return await asyncio.wait_for(asyncio.to_thread(_probe_memgraph), MEMGRAPH_PROBE_TIMEOUT)
+
 class AnalyzeRequest(BaseModel):
     repo_path: str
 
@@ -193,9 +370,6 @@ class FileSearchRequest(BaseModel):
     file_path: str
     limit: int = 50
 
-class EntryPointsRequest(BaseModel):
-    limit: int = 20
-
 class ExecutionFlowRequest(BaseModel):
     entry_points: List[str]
     depth: int = 3
@@ -205,9 +379,6 @@ class DependencyQueryRequest(BaseModel):
     direction: str = "both"
     depth: int = 1
 
-class CentralityRequest(BaseModel):
-    pass
-
 class GitHubCloneRequest(BaseModel):
     github_url: str
     force_fresh: bool = False
@@ -241,7 +412,7 @@ async def analyze_repository(request: AnalyzeRequest):
         if not repo_path.exists():
             raise HTTPException(status_code=404, detail="Repository path not found")
         
-        result = await analyzer.analyze_repository(repo_path)
+        result = await run_analysis(analyzer, repo_path)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -266,21 +437,51 @@ async def clone_github_repository(request: GitHubCloneRequest):
         raise HTTPException(status_code=500, detail=f"Clone operation failed: {str(e)}")
 
 @app.post("/github/analyze")
-async def analyze_github_repository(request: AnalyzeGitHubRequest):
+async def analyze_github_repository(
+    request: AnalyzeGitHubRequest,
+    fast: bool = Query(False, description="Analyze a cached checkout while checking the remote for changes")
+):
     """Clone a GitHub repository and analyze it in one step."""
     if not analyzer or not github_manager:
         raise HTTPException(status_code=500, detail="Services not initialized")
     
     try:
-        # First clone or update the repository
-        clone_result = await github_manager.clone_or_update_repo(
-            github_url=request.github_url,
-            force_fresh=request.force_fresh
-        )
+        repo_path = None
+        if fast and not request.force_fresh and github_manager.is_github_url(request.github_url):
+            repo_path = github_manager.cached_repo_path(request.github_url)
         
-        # Then analyze the cloned repository
-        repo_path = Path(clone_result["local_path"])
-        analysis_result = await analyzer.analyze_repository(repo_path)
+        if repo_path:
+            # Analyze the checkout as it is while fetching; the fetch only
+            # touches .git, so the analysis stands if the checkout is current
+            cancel_analysis = threading.Event()
+            analysis_task = asyncio.create_task(run_analysis(analyzer, repo_path, cancel_analysis))
+            try:
+                behind = await github_manager.fetch_cached_repo(request.github_url)
+            except Exception:
+                cancel_analysis.set()
+                await asyncio.gather(analysis_task, return_exceptions=True)
+                raise
+            if behind:
+                # The speculative analysis is stale. Stop it and wait until its
+                # worker thread has returned, so nothing is reading the checkout
+                # when it is reset and nothing stale reaches the index
+                cancel_analysis.set()
+                await asyncio.gather(analysis_task, return_exceptions=True)
+                clone_result = await github_manager.apply_fetched_update(request.github_url, behind)
+                analysis_result = await run_analysis(analyzer, repo_path)
+            else:
+                analysis_result = await analysis_task
+                clone_result = await github_manager.apply_fetched_update(request.github_url, behind)
+        else:
+            # First clone or update the repository
+            clone_result = await github_manager.clone_or_update_repo(
+                github_url=request.github_url,
+                force_fresh=request.force_fresh
+            )
+            
+            # Then analyze the cloned repository
+            repo_path = Path(clone_result["local_path"])
+            analysis_result = await run_analysis(analyzer, repo_path)
         
         # Combine results
         return {
@@ -314,7 +515,7 @@ async def delete_cached_repository(github_url: str = Query(..., description="Git
         raise HTTPException(status_code=500, detail="GitHub manager not initialized")
     
     try:
-        success = github_manager.delete_cached_repo(github_url)
+        success = await asyncio.to_thread(github_manager.delete_cached_repo, github_url)
         if success:
             return {"message": "Repository deleted successfully", "github_url": github_url}
         else:
@@ -329,7 +530,7 @@ async def cleanup_old_repositories(max_repos: int = Query(10, description="Maxim
         raise HTTPException(status_code=500, detail="GitHub manager not initialized")
     
     try:
-        removed_count = github_manager.cleanup_old_repos(max_repos)
+        removed_count = await asyncio.to_thread(github_manager.cleanup_old_repos, max_repos)
         return {
             "message": f"Cleanup completed",
             "repositories_removed": removed_count,
@@ -470,13 +671,13 @@ async def find_similar_chunks(request: SimilarChunksRequest):
 # === EXECUTION FLOW ANALYSIS ENDPOINTS ===
 
 @app.post("/analyze/entry-points")
-async def find_entry_points(request: EntryPointsRequest):
+async def find_entry_points(limit: int = Query(20, description="Maximum number of entry points to return")):
     """Find potential entry points in the codebase."""
     if not analyzer or not analyzer.vector_indexer:
         raise HTTPException(status_code=503, detail="Vector analysis not available - please configure OpenAI API key and Qdrant")
     
     try:
-        results = await analyzer.find_entry_points(limit=request.limit)
+        results = await analyzer.find_entry_points(limit=limit)
         return {
             "total_entry_points": len(results),
             "entry_points": results
@@ -512,31 +713,40 @@ async def get_index_stats():
     if not analyzer:
         raise HTTPException(status_code=500, detail="Analyzer not initialized")
     
+    cached = get_cached_response("index_stats")
+    if cached:
+        return cached
+    version = analyzer.version
+    
     stats = {
         "lexical_index": {"document_count": 0, "last_updated": "Never", "index_size_mb": 0},
         "vector_index": {"collection_exists": False, "points_count": 0, "vectors_size_mb": 0},
         "dependency_graph": {"nodes": 0, "edges": 0, "last_updated": "Never"}
     }
     
-    if analyzer.lexical_indexer:
-        try:
-            stats["lexical_index"] = analyzer.lexical_indexer.get_stats()
-        except Exception as e:
-            stats["lexical_index"]["error"] = str(e)
-    
-    if analyzer.vector_indexer:
-        try:
-            stats["vector_index"] = analyzer.vector_indexer.get_stats()
-        except Exception as e:
-            stats["vector_index"]["error"] = str(e)
-    
-    if analyzer.dependency_graph_builder:
-        try:
-            stats["dependency_graph"] = analyzer.dependency_graph_builder.get_stats()
-        except Exception as e:
-            stats["dependency_graph"]["error"] = str(e)
+    # The lookups are blocking (an index directory walk, a Qdrant request),
+    # so run them concurrently in worker threads
+    components = [
+        (name, component) for name, component in (
+            ("lexical_index", analyzer.lexical_indexer),
+            ("vector_index", analyzer.vector_indexer),
+            ("dependency_graph", analyzer.dependency_graph_builder)
+        ) if component
+    ]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(component.get_stats) for _, component in components),
+        return_exceptions=True
+    )
+    for (name, _), result in zip(components, results):
+        if isinstance(result, Exception):
+            stats[name]["error"] = str(result)
+        else:
+            stats[name] = result
     
-    return stats
+    # Errors may be transient, so only cache a clean result
+    if any("error" in c or str(c.get("status", "")).startswith("Error") for c in stats.values()):
+        return stats
+    return cache_response("index_stats", version, stats)
 
 @app.delete("/index/clear")
 async def clear_indexes():
@@ -567,6 +777,7 @@ async def clear_indexes():
         except Exception as e:
             pass
     
+    analyzer.version += 1
     return {"cleared": cleared}
 
 # === DEPENDENCY GRAPH ENDPOINTS ===
@@ -599,38 +810,40 @@ async def get_call_graph():
     if not analyzer or not analyzer.dependency_graph_builder:
         raise HTTPException(status_code=503, detail="Dependency graph not available - please configure Memgraph")
     
+    cached = get_cached_response("call_graph")
+    if cached:
+        return cached
+    version = analyzer.version
+    
     try:
-        call_graph = analyzer.get_call_graph()
-        if not call_graph:
+        # Snapshot in a worker thread; an analysis may be rebuilding the graph
+        snapshot = await asyncio.to_thread(analyzer.get_call_graph_snapshot)
+        if not snapshot or not snapshot[0]:
             return {"error": "Dependency graph not available"}
+        graph_nodes, graph_edges = snapshot
         
-        # Convert NetworkX graph to JSON format
-        nodes = []
-        edges = []
+        # Stream the snapshot as JSON
+        nodes = ({
+            "id": node_id,
+            "ast_type": node_data.get("ast_type", "unknown"),
+            "path": node_data.get("path", ""),
+            "start_line": node_data.get("start_line", 0),
+            "parent_symbol": node_data.get("parent_symbol", "")
+        } for node_id, node_data in graph_nodes)
         
-        for node_id, node_data in call_graph.nodes(data=True):
-            nodes.append({
-                "id": node_id,
-                "ast_type": node_data.get("ast_type", "unknown"),
-                "path": node_data.get("path", ""),
-                "start_line": node_data.get("start_line", 0),
-                "parent_symbol": node_data.get("parent_symbol", "")
-            })
+        edges = ({
+            "source": source,
+            "target": target,
+            "function_name": edge_data.get("function_name", ""),
+            "confidence": edge_data.get("confidence", 1.0)
+        } for source, target, edge_data in graph_edges)
         
-        for source, target, edge_data in call_graph.edges(data=True):
-            edges.append({
-                "source": source,
-                "target": target,
-                "function_name": edge_data.get("function_name", ""),
-                "confidence": edge_data.get("confidence", 1.0)
-            })
-        
-        return {
-            "total_nodes": len(nodes),
-            "total_edges": len(edges),
-            "nodes": nodes,
-            "edges": edges
+        header = {
+            "total_nodes": len(graph_nodes),
+            "total_edges": len(graph_edges)
         }
+        body = stream_and_cache("call_graph", version, stream_graph_json(header, nodes, edges))
+        return StreamingResponse(body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Call graph query failed: {str(e)}")
 
@@ -640,37 +853,39 @@ async def get_import_graph():
     if not analyzer or not analyzer.dependency_graph_builder:
         raise HTTPException(status_code=503, detail="Dependency graph not available - please configure Memgraph")
     
+    cached = get_cached_response("import_graph")
+    if cached:
+        return cached
+    version = analyzer.version
+    
     try:
-        import_graph = analyzer.get_import_graph()
-        if not import_graph:
+        # Snapshot in a worker thread; an analysis may be rebuilding the graph
+        snapshot = await asyncio.to_thread(analyzer.get_import_graph_snapshot)
+        if not snapshot or not snapshot[0]:
             return {"error": "Dependency graph not available"}
+        graph_nodes, graph_edges = snapshot
         
-        # Convert NetworkX graph to JSON format
-        nodes = []
-        edges = []
+        # Stream the snapshot as JSON
+        nodes = ({
+            "id": node_id,
+            "type": node_data.get("type", "unknown"),
+            "path": node_data.get("path", ""),
+            "name": node_data.get("name", "")
+        } for node_id, node_data in graph_nodes)
         
-        for node_id, node_data in import_graph.nodes(data=True):
-            nodes.append({
-                "id": node_id,
-                "type": node_data.get("type", "unknown"),
-                "path": node_data.get("path", ""),
-                "name": node_data.get("name", "")
-            })
+        edges = ({
+            "source": source,
+            "target": target,
+            "module": edge_data.get("module", ""),
+            "confidence": edge_data.get("confidence", 1.0)
+        } for source, target, edge_data in graph_edges)
         
-        for source, target, edge_data in import_graph.edges(data=True):
-            edges.append({
-                "source": source,
-                "target": target,
-                "module": edge_data.get("module", ""),
-                "confidence": edge_data.get("confidence", 1.0)
-            })
-        
-        return {
-            "total_nodes": len(nodes),
-            "total_edges": len(edges),
-            "nodes": nodes,
-            "edges": edges
+        header = {
+            "total_nodes": len(graph_nodes),
+            "total_edges": len(graph_edges)
         }
+        body = stream_and_cache("import_graph", version, stream_graph_json(header, nodes, edges))
+        return StreamingResponse(body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Import graph query failed: {str(e)}")
 
@@ -680,48 +895,50 @@ async def get_full_dependency_graph():
     if not analyzer or not analyzer.dependency_graph_builder:
         raise HTTPException(status_code=503, detail="Dependency graph not available - please configure Memgraph")
     
+    cached = get_cached_response("full_dependency_graph")
+    if cached:
+        return cached
+    version = analyzer.version
+    
     try:
-        dependency_graph = analyzer.get_dependency_graph()
-        if not dependency_graph:
+        # Snapshot in a worker thread; an analysis may be rebuilding the graph
+        snapshot = await asyncio.to_thread(analyzer.get_dependency_graph_snapshot)
+        if not snapshot or not snapshot[0]:
             return {"error": "Dependency graph not available"}
-        
-        # Convert NetworkX graph to JSON format
-        nodes = []
-        edges = []
-        
-        for node_id, node_data in dependency_graph.nodes(data=True):
-            nodes.append({
-                "id": node_id,
-                "type": node_data.get("type", "unknown"),
-                "ast_type": node_data.get("ast_type", ""),
-                "path": node_data.get("path", ""),
-                "start_line": node_data.get("start_line", 0),
-                "end_line": node_data.get("end_line", 0),
-                "parent_symbol": node_data.get("parent_symbol", "")
-            })
-        
-        for source, target, edge_data in dependency_graph.edges(data=True):
-            edges.append({
-                "source": source,
-                "target": target,
-                "type": edge_data.get("type", "related"),
-                "confidence": edge_data.get("confidence", 1.0),
-                "metadata": {k: v for k, v in edge_data.items() if k not in ["type", "confidence"]}
-            })
+        graph_nodes, graph_edges = snapshot
         
         # Group edges by type for statistics
         edge_types = {}
-        for edge in edges:
-            edge_type = edge["type"]
+        for _, _, edge_data in graph_edges:
+            edge_type = edge_data.get("type", "related")
             edge_types[edge_type] = edge_types.get(edge_type, 0) + 1
         
-        return {
-            "total_nodes": len(nodes),
-            "total_edges": len(edges),
-            "edge_types": edge_types,
-            "nodes": nodes,
-            "edges": edges
+        # Stream the NetworkX graph as JSON
+        nodes = ({
+            "id": node_id,
+            "type": node_data.get("type", "unknown"),
+            "ast_type": node_data.get("ast_type", ""),
+            "path": node_data.get("path", ""),
+            "start_line": node_data.get("start_line", 0),
+            "end_line": node_data.get("end_line", 0),
+            "parent_symbol": node_data.get("parent_symbol", "")
+        } for node_id, node_data in graph_nodes)
+        
+        edges = ({
+            "source": source,
+            "target": target,
+            "type": edge_data.get("type", "related"),
+            "confidence": edge_data.get("confidence", 1.0),
+            "metadata": {k: v for k, v in edge_data.items() if k not in ["type", "confidence"]}
+        } for source, target, edge_data in graph_edges)
+        
+        header = {
+            "total_nodes": len(graph_nodes),
+            "total_edges": len(graph_edges),
+            "edge_types": edge_types
         }
+        body = stream_and_cache("full_dependency_graph", version, stream_graph_json(header, nodes, edges))
+        return StreamingResponse(body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dependency graph query failed: {str(e)}")
 
@@ -731,36 +948,33 @@ async def get_centrality_metrics():
     if not analyzer or not analyzer.dependency_graph_builder:
         raise HTTPException(status_code=503, detail="Dependency graph not available - please configure Memgraph")
     
+    cached = get_cached_response("centrality")
+    if cached:
+        return cached
+    version = analyzer.version
+    
     try:
         metrics = analyzer.get_centrality_metrics()
         if not metrics:
             return {"error": "Centrality metrics not available"}
         
-        # Sort by different centrality measures
+        # Pick the top nodes by each centrality measure; nlargest keeps sorted()'s
+        # tie order without sorting every node
         sorted_metrics = {
-            "by_betweenness": sorted(
-                [(node, data["betweenness"]) for node, data in metrics.items()],
-                key=lambda x: x[1], reverse=True
-            )[:20],
-            "by_pagerank": sorted(
-                [(node, data["pagerank"]) for node, data in metrics.items()],
-                key=lambda x: x[1], reverse=True
-            )[:20],
-            "by_in_degree": sorted(
-                [(node, data["in_degree"]) for node, data in metrics.items()],
-                key=lambda x: x[1], reverse=True
-            )[:20],
-            "by_out_degree": sorted(
-                [(node, data["out_degree"]) for node, data in metrics.items()],
-                key=lambda x: x[1], reverse=True
-            )[:20]
+            f"by_{measure}": [
+                (node, data[measure])
+                for node, data in heapq.nlargest(20, metrics.items(), key=lambda item: item[1][measure])
+            ]
+            for measure in ("betweenness", "pagerank", "in_degree", "out_degree")
         }
         
-        return {
+        result = {
             "total_nodes_analyzed": len(metrics),
-            "top_nodes": sorted_metrics,
-            "all_metrics": metrics
+            "top_nodes": sorted_metrics
         }
+        if len(metrics) <= CENTRALITY_ALL_METRICS_MAX_NODES:
+            result["all_metrics"] = metrics
+        return cache_response("centrality", version, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Centrality analysis failed: {str(e)}")
 
@@ -906,7 +1120,7 @@ async def analyze_repository_endpoint(request: AnalyzeRequest):
         )
         
         # Analyze repository
-        result = await analyzer.analyze_repository(repo_path)
+        result = await run_analysis(analyzer, repo_path)
         
         return {
             "status": "success",
@@ -1018,9 +1232,9 @@ async def clear_summary_cache():
 
 # Health check endpoint
 @app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    services = await check_external_services()
+async def health_check(refresh: bool = False):
+    """Health check endpoint; pass refresh=true to re-probe external services now."""
+    services = await get_external_services(force=refresh)
     
     # Add Scout-specific service checks
     scout_services = {
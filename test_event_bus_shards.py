@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test for the weekly-sharded event store without running the API.
+
+This script tests:
+1. Concurrent emits across two ISO weeks land in the right shard files
+2. get_events merges shards newest-first, honoring limit and the date range
+3. Rows in a pre-sharding EVENT_DB_PATH database are still returned
+4. close() followed by initialize() keeps working
+
+It does NOT require any external services.
+"""
+
+import asyncio
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the backend directory to the path
+sys.path.append('backend')
+
+from backend.app.event_bus import EventBus, EventType, NormalizedEvent
+
+
+# Mondays of ISO weeks 2025W02 and 2025W03
+WEEK_A = datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc)
+WEEK_B = datetime(2025, 1, 13, 9, 0, tzinfo=timezone.utc)
+EVENTS_PER_WEEK = 25
+
+# Schema of the single events database used before sharding
+LEGACY_SCHEMA = """
+CREATE TABLE events (
+    event_id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    who TEXT NOT NULL,
+    what TEXT NOT NULL,
+    linked_to TEXT,
+    metadata TEXT,
+    severity TEXT,
+    repository TEXT,
+    project TEXT,
+    enrichments TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def make_event(event_id: str, timestamp: datetime) -> NormalizedEvent:
+    return NormalizedEvent(
+        event_id=event_id,
+        event_type=EventType.GITHUB_PUSH,
+        timestamp=timestamp,
+        who="tester",
+        what=f"Pushed {event_id}",
+        repository="scout/test"
+    )
+
+
+def week_events(prefix: str, start: datetime):
+    """Events spread over the first days of start's week, one hour apart."""
+    return [make_event(f"{prefix}{i:02d}", start + timedelta(hours=i)) for i in range(EVENTS_PER_WEEK)]
+
+
+def shard_rows(path: Path):
+    """(event_id, timestamp) rows stored in a shard file."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT event_id, timestamp FROM events").fetchall()
+    finally:
+        conn.close()
+
+
+async def emit_two_weeks(db_path: Path) -> None:
+    """Emit week A's and week B's events concurrently through one bus."""
+    bus = EventBus(str(db_path))
+    events = week_events("a", WEEK_A) + week_events("b", WEEK_B)
+    try:
+        results = await asyncio.gather(*(bus.emit_event(event) for event in events))
+    finally:
+        await bus.close()
+    assert all(results), "some emits failed"
+
+
+async def test_concurrent_emits_land_in_week_shards(tmp: Path):
+    """Events emitted concurrently are routed to their own week's shard."""
+    print("🧪 Testing concurrent emits across two ISO weeks...")
+    await emit_two_weeks(tmp / "events.db")
+
+    shard_files = sorted(p.name for p in tmp.glob("events_*.db"))
+    assert shard_files == ["events_2025W02.db", "events_2025W03.db"], shard_files
+    for name, prefix in (("events_2025W02.db", "a"), ("events_2025W03.db", "b")):
+        rows = shard_rows(tmp / name)
+        assert len(rows) == EVENTS_PER_WEEK, f"{name} holds {len(rows)} events"
+        assert all(event_id.startswith(prefix) for event_id, _ in rows), f"{name} holds another week's events"
+
+    print("✅ Each week's events are in its own shard")
+
+
+async def test_get_events_merges_newest_first(tmp: Path):
+    """Reads across shards come back newest-first, limited and range-filtered."""
+    print("🧪 Testing get_events across shards...")
+    await emit_two_weeks(tmp / "events.db")
+    bus = EventBus(str(tmp / "events.db"))
+    try:
+        events = await bus.get_events(limit=1000)
+        timestamps = [event.timestamp for event in events]
+        assert len(events) == 2 * EVENTS_PER_WEEK, f"got {len(events)} events"
+        assert timestamps == sorted(timestamps, reverse=True), "events are not newest-first"
+
+        newest = await bus.get_events(limit=5)
+        assert [e.event_id for e in newest] == [e.event_id for e in events[:5]], "limit did not keep the newest events"
+
+        # A range covering the end of week A and the start of week B
+        start = WEEK_A + timedelta(hours=20)
+        end = WEEK_B + timedelta(hours=4)
+        ranged = await bus.get_events(start_time=start, end_time=end, limit=1000)
+        expected = [e.event_id for e in events if start <= e.timestamp <= end]
+        assert [e.event_id for e in ranged] == expected, "date range was not honored"
+        assert {e.event_id[0] for e in ranged} == {"a", "b"}, "range should span both shards"
+
+        only_b = await bus.get_events(start_time=WEEK_B, limit=1000)
+        assert {e.event_id[0] for e in only_b} == {"b"}, "start_time should exclude week A"
+    finally:
+        await bus.close()
+
+    print("✅ Shards are merged newest-first with limit and date range applied")
+
+
+async def test_legacy_database_is_read(tmp: Path):
+    """Events stored in EVENT_DB_PATH before sharding are still returned."""
+    print("🧪 Testing events in a pre-sharding database...")
+    db_path = tmp / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEGACY_SCHEMA)
+    legacy_time = WEEK_A - timedelta(days=30)
+    conn.execute(
+        "INSERT INTO events (event_id, event_type, timestamp, who, what, metadata, severity, enrichments) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ("legacy", EventType.GITHUB_PUSH.value, legacy_time.isoformat(), "tester", "Old push", "{}", "low", "{}")
+    )
+    conn.commit()
+    conn.close()
+
+    bus = EventBus(str(db_path))
+    try:
+        assert await bus.emit_event(make_event("new", WEEK_B)), "emit failed"
+        events = await bus.get_events(limit=10)
+        assert [e.event_id for e in events] == ["new", "legacy"], [e.event_id for e in events]
+
+        old_only = await bus.get_events(end_time=WEEK_A, limit=10)
+        assert [e.event_id for e in old_only] == ["legacy"], "legacy events should honor the date range"
+    finally:
+        await bus.close()
+
+    assert len(shard_rows(db_path)) == 1, "the legacy database should not be written to"
+    print("✅ Pre-sharding events are merged into the timeline")
+
+
+async def test_close_then_initialize(tmp: Path):
+    """A closed bus can be initialized again and keeps writing and reading."""
+    print("🧪 Testing close() followed by initialize()...")
+    bus = EventBus(str(tmp / "events.db"))
+    await bus.initialize()
+    assert await bus.emit_event(make_event("first", WEEK_A)), "emit before close failed"
+    await bus.close()
+
+    await bus.initialize()
+    try:
+        assert await bus.emit_event(make_event("second", WEEK_B)), "emit after reopen failed"
+        events = await bus.get_events(limit=10)
+        assert [e.event_id for e in events] == ["second", "first"], [e.event_id for e in events]
+    finally:
+        await bus.close()
+
+    print("✅ The bus reopens after close()")
+
+
+async def run_tests() -> bool:
+    """Run each test against its own temporary directory."""
+    tests = [
+        test_concurrent_emits_land_in_week_shards,
+        test_get_events_merges_newest_first,
+        test_legacy_database_is_read,
+        test_close_then_initialize,
+    ]
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                await test(Path(tmp))
+            except AssertionError as e:
+                print(f"❌ {test.__name__} failed: {e}")
+                return False
+    return True
+
+
+if __name__ == "__main__":
+    print("🔍 Running event bus shard tests (no services required)")
+
+    if asyncio.run(run_tests()):
+        print("\n✅ All event bus shard tests passed!")
+    else:
+        print("\n❌ Some tests failed")
+        sys.exit(1)